@@ -1,6 +1,19 @@
-import pandas as pd
+
 import streamlit as st
-import altair as alt
+
+import metrics
+from charts import financials_by_branch_chart, monthly_company_performance_chart, monthly_performance_for_branch_chart
+from cube import monthly_series
+from data_cache import attach_session, load_chart_cached, load_cube_cached, load_ranking_cached, open_dataset, pivot_cache
+from data_loader import INGEST_MODES
+from overview import branch_overview, kpi_overview
+from panels import (
+    append_panel, datasets_panel, memory_panel, prefetch_panel, profile_panel, rejected_panel, start_profiling
+)
+from prefetch import start_prefetch
+from profiling import stage
+from ranking import RANKED_METRICS, REVIEW_THRESHOLD
+from summary_view import paginate_rows
 
 st.set_page_config(page_title="Branch Performance Dashboard", layout="wide")
 st.title("📊 Company Overview")
@@ -34,206 +47,79 @@ def performance_status_display(ratio):
     else:
         return ""  # No star for NPW with ratio <= 1
 
+# --- Ranked employee rows formatted for display ---
+def employee_rows(rows, show_branch=True):
+    for col in ['Revenue', 'Expense', 'Salary', 'Net Income']:
+        rows[col] = metrics.format_currency(rows[col])
+    rows['Status'] = metrics.ratio_label(rows['Performance Ratio'])
+    rows = rows.drop(columns=['Performance Ratio'])
+    return rows if show_branch else rows.drop(columns=['BranchName'])
+
 # --- Sidebar: File Uploads ---
 st.sidebar.header("📤 Upload CSV Files")
 
 uploaded_employees = st.sidebar.file_uploader("Upload Employees CSV", type="csv")
 uploaded_branches = st.sidebar.file_uploader("Upload Branches CSV", type="csv")
-uploaded_transactions = st.sidebar.file_uploader("Upload Transactions CSV", type="csv")
-
-# --- Function to Load and Process Data ---
-def load_data(emp_file, branch_file, trans_file):
-    employees = pd.read_csv(emp_file)
-    branches = pd.read_csv(branch_file)
-    transactions = pd.read_csv(trans_file)
-
-    # Merge datasets
-    emp_branch = pd.merge(employees, branches, on='BranchID', how='left')
-    df = pd.merge(transactions, emp_branch, on='EmployeeID', how='left')
-
-    # Parse dates
-    df['Date'] = pd.to_datetime(df['Date'])
-    df['Year'] = df['Date'].dt.year
-    df['Month'] = df['Date'].dt.month
-
-    # Pivot table by transaction type
-    pivot_df = df.pivot_table(
-        index=['EmployeeID', 'EmployeeName', 'BranchName', 'Year', 'Month', 'Date'],
-        columns='Type',
-        values='Amount',
-        aggfunc='sum',
-        fill_value=0
-    ).reset_index()
-
-    # Flatten columns
-    pivot_df.columns = ['_'.join(col).strip() if isinstance(col, tuple) else col for col in pivot_df.columns.values]
-
-    # Clean and compute Net Income
-    pivot_df['BranchName'] = pivot_df['BranchName'].astype(str)
-    for col in ['Revenue', 'Expense', 'Salary']:
-        if col not in pivot_df.columns:
-            pivot_df[col] = 0
-        else:
-            pivot_df[col] = pd.to_numeric(pivot_df[col], errors='coerce').fillna(0)
-
-    pivot_df['Net Income'] = pivot_df['Revenue'] - pivot_df['Expense'] - pivot_df['Salary']
-
-    return pivot_df
-
-# --- Chart: Financials by Branch ---
-def financials_by_branch_chart(df):
-    summary = df.groupby("BranchName")[["Revenue", "Expense", "Salary"]].sum().reset_index()
-    summary["Total Expenses"] = summary["Expense"] + summary["Salary"]
-    summary["Net Income"] = summary["Revenue"] - summary["Total Expenses"]
-    summary["Net Income Category"] = summary["Net Income"].apply(lambda x: "Net Income (Good)" if x > 0 else "Net Income (Review)")
-
-    bar_df = summary.melt(
-        id_vars=["BranchName", "Net Income Category"],
-        value_vars=["Revenue", "Total Expenses", "Net Income"],
-        var_name="Metric",
-        value_name="Amount"
-    )
-
-    bar_df["Display Label"] = bar_df.apply(lambda row: (
-        "Net Income (Good)" if row["Metric"] == "Net Income" and row["Net Income Category"] == "Net Income (Good)"
-        else "Net Income (Review)" if row["Metric"] == "Net Income"
-        else row["Metric"]
-    ), axis=1)
-
-    color_scale = alt.Scale(domain=[
-        "Net Income (Good)", "Net Income (Review)", "Total Expenses", "Revenue"
-    ], range=["#2ecc71", "#f1c40f", "#e74c3c", "#9b59b6"])
-
-    chart = alt.Chart(bar_df).mark_bar().encode(
-        x=alt.X("BranchName:N", title="Branch", axis=alt.Axis(labelAngle=-30)),
-        y=alt.Y("Amount:Q", title="Amount ($)", stack=None),
-        color=alt.Color("Display Label:N", scale=color_scale, title="Metric"),
-        tooltip=["BranchName", "Metric", "Amount"],
-        xOffset='Display Label:N'
-    ).properties(
-        width=600,
-        height=400,
-        title="📊 Financials by Branch"
-    )
-
-    return chart
-
-# --- Chart: 12-Month Company Performance ---
-def monthly_company_performance_chart(df):
-    df['Month_Year'] = df['Date'].dt.to_period('M').astype(str)
-    monthly = df.groupby("Month_Year").agg({
-        "Revenue": "sum",
-        "Expense": "sum",
-        "Salary": "sum"
-    }).reset_index()
-
-    monthly["Gross Sales"] = monthly["Revenue"]
-    monthly["Total Expenses"] = monthly["Expense"] + monthly["Salary"]
-    monthly["Net Sales"] = monthly["Revenue"] - monthly["Total Expenses"]
-
-    bar_df = monthly.melt(
-        id_vars=["Month_Year", "Net Sales"],
-        value_vars=["Gross Sales", "Total Expenses"],
-        var_name="Metric",
-        value_name="Amount"
-    )
-
-    bar_color_scale = alt.Scale(
-        domain=["Gross Sales", "Total Expenses"],
-        range=["#9b59b6", "#e74c3c"]
-    )
-
-    bar_chart = alt.Chart(bar_df).mark_bar().encode(
-        x=alt.X("Month_Year:N", title="Month", axis=alt.Axis(labelAngle=-45)),
-        y=alt.Y("Amount:Q", title="Amount ($)", stack=None),
-        color=alt.Color("Metric:N", scale=bar_color_scale, title=""),
-        xOffset="Metric:N",
-        tooltip=["Month_Year", "Metric", "Amount"]
-    )
-
-    line_chart = alt.Chart(monthly).mark_line(point=alt.OverlayMarkDef(color="#2ecc71", filled=True)).encode(
-        x=alt.X("Month_Year:N"),
-        y=alt.Y("Net Sales:Q"),
-        color=alt.value("#2ecc71"),
-        tooltip=["Month_Year", "Net Sales"]
-    )
-
-    chart = alt.layer(bar_chart, line_chart).properties(
-        width=700,
-        height=400,
-        title="📅 12-Month Company Performance"
-    )
-
-    return chart
-
-# --- Chart: 12-Month Branch Performance (filtered) ---
-def monthly_performance_for_branch_chart(df, branch_name):
-    df['Month_Year'] = df['Date'].dt.to_period('M').astype(str)
-    monthly = df.groupby("Month_Year").agg({
-        "Revenue": "sum",
-        "Expense": "sum",
-        "Salary": "sum"
-    }).reset_index()
-
-    monthly["Gross Sales"] = monthly["Revenue"]
-    monthly["Total Expenses"] = monthly["Expense"] + monthly["Salary"]
-    monthly["Net Sales"] = monthly["Revenue"] - monthly["Total Expenses"]
-
-    bar_df = monthly.melt(
-        id_vars=["Month_Year", "Net Sales"],
-        value_vars=["Gross Sales", "Total Expenses"],
-        var_name="Metric",
-        value_name="Amount"
-    )
-
-    bar_color_scale = alt.Scale(
-        domain=["Gross Sales", "Total Expenses"],
-        range=["#9b59b6", "#e74c3c"]
-    )
-
-    bar_chart = alt.Chart(bar_df).mark_bar().encode(
-        x=alt.X("Month_Year:N", title="Month", axis=alt.Axis(labelAngle=-45)),
-        y=alt.Y("Amount:Q", title="Amount ($)", stack=None),
-        color=alt.Color("Metric:N", scale=bar_color_scale, title=""),
-        xOffset="Metric:N",
-        tooltip=["Month_Year", "Metric", "Amount"]
-    )
+# Several files (monthly or regional shards) are aggregated in parallel worker processes
+uploaded_transactions = st.sidebar.file_uploader("Upload Transactions CSV", type="csv", accept_multiple_files=True)
+ingest_mode = st.sidebar.selectbox("Ingest mode", list(INGEST_MODES))
+tracer = start_profiling()
 
-    line_chart = alt.Chart(monthly).mark_line(point=alt.OverlayMarkDef(color="#2ecc71", filled=True)).encode(
-        x=alt.X("Month_Year:N"),
-        y=alt.Y("Net Sales:Q"),
-        color=alt.value("#2ecc71"),
-        tooltip=["Month_Year", "Net Sales"]
-    )
-
-    chart = alt.layer(bar_chart, line_chart).properties(
-        width=700,
-        height=400,
-        title=f"📅 12-Month Performance: {branch_name}"
+# --- Main App Logic ---
+with stage("load"):
+    data_key, df = open_dataset(
+        uploaded_employees, uploaded_branches, uploaded_transactions,
+        **INGEST_MODES[ingest_mode]
     )
 
-    return chart
+if df is not None:
+    rejected_panel(data_key)
 
-# --- Main App Logic ---
-if uploaded_employees and uploaded_branches and uploaded_transactions:
-    df = load_data(uploaded_employees, uploaded_branches, uploaded_transactions)
+    # Fold any delta transaction files into the loaded data
+    with stage("append"):
+        data_key, df = append_panel(
+            data_key, df, uploaded_employees, uploaded_branches, uploaded_transactions
+        )
 
-    branches = sorted(df['BranchName'].dropna().unique())
+    # Hold the shared dataset for this session so other sessions' loads evict it last
+    attach_session(st.session_state, data_key)
+    with stage("cube"):
+        cube = load_cube_cached(df, data_key)
+    memory_panel({"Pivot frame": df, "Cube": cube})
+    datasets_panel()
+    cache_stats = pivot_cache.stats()
+    st.sidebar.caption(f"Load cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+
+    # Compute every branch view in the background so switching branches is instant
+    with stage("prefetch"):
+        prefetch = start_prefetch(cube, data_key)
+    prefetch_panel(prefetch)
+
+    # Employees kept ranked by each metric, for top-K and Needs Review lists
+    with stage("ranking"):
+        ranking = load_ranking_cached(cube, data_key)
+
+    branches = sorted(cube['BranchName'].dropna().unique())
     overview_options = ["📊 Company Overview"] + [f"📍 {branch}" for branch in branches]
 
     st.sidebar.header("📋 Select Overview")
     selected_overview = st.sidebar.radio("Choose Overview", overview_options)
+    review_threshold = st.sidebar.number_input(
+        "Needs Review below ratio", min_value=0.0, value=REVIEW_THRESHOLD, step=0.5
+    )
 
     if selected_overview == "📊 Company Overview":
         # Company-wide metrics
-        total_sales = df['Revenue'].sum()
-        total_expenses = df['Expense'].sum() + df['Salary'].sum()
-        net_income = total_sales - total_expenses
+        with stage("kpis"):
+            totals = kpi_overview(cube)
+        total_sales = totals['total_sales']
+        total_expenses = totals['total_expenses']
+        net_income = totals['net_income']
         avg_customer_rating = 4.69
-        total_branches = df['BranchName'].nunique()
-        total_employees = df['EmployeeID'].nunique()
-        performance_ratio = total_sales / total_expenses if total_expenses > 0 else float('inf')
-        performance_status = "PW" if performance_ratio >= 3 else "NPW"
+        total_branches = totals['total_branches']
+        total_employees = totals['total_employees']
+        performance_ratio = totals['performance_ratio']
+        performance_status = totals['performance_status']
         perf_status_display = blinking_star() if performance_status == "PW" else ("⭐" if performance_ratio > 1 else "")
 
         # Display company overview
@@ -252,50 +138,59 @@ if uploaded_employees and uploaded_branches and uploaded_transactions:
         st.markdown("### 📈 Visualizations")
 
         # Financials by branch bar chart
-        st.altair_chart(financials_by_branch_chart(df), use_container_width=True)
+        with stage("chart: financials by branch"):
+            chart = load_chart_cached(data_key, ["financials"], lambda: financials_by_branch_chart(cube))
+        with stage("render: financials by branch"):
+            st.vega_lite_chart(chart, width="stretch")
 
         # 12-Month Company Performance chart
-        st.altair_chart(monthly_company_performance_chart(df), use_container_width=True)
+        with stage("chart: company performance"):
+            chart = load_chart_cached(data_key, ["company"], lambda: monthly_company_performance_chart(monthly_series(cube)))
+        with stage("render: company performance"):
+            st.vega_lite_chart(chart, width="stretch")
+
+        # Company-wide employee rankings, one page at a time
+        st.markdown("### 🏆 Employee Rankings")
+        col1, col2 = st.columns(2)
+        rank_metric = col1.selectbox("Rank by", RANKED_METRICS)
+        rank_order = col2.radio("Order", ["Top", "Bottom"], horizontal=True)
+        with stage("render: rankings"):
+            paginate_rows(
+                ranking.count(),
+                lambda start, stop: employee_rows(
+                    ranking.ranked(rank_metric, start=start, stop=stop, descending=rank_order == "Top")
+                ),
+                key=f"ranking_{rank_metric}_{rank_order}",
+            )
+
+        st.markdown(f"### 🔎 Needs Review (ratio below {review_threshold:g}x)")
+        with stage("render: needs review"):
+            paginate_rows(
+                ranking.below_count('Performance Ratio', review_threshold),
+                lambda start, stop: employee_rows(
+                    ranking.below('Performance Ratio', review_threshold, start=start, stop=stop)
+                ),
+                key="review_company",
+            )
 
     else:
         # Branch overview
         selected_branch = selected_overview.replace("📍 ", "")
-        branch_df = df[df['BranchName'] == selected_branch]
+        with stage("branch overview"):
+            overview = prefetch.get(selected_branch) or branch_overview(cube, selected_branch, employees=False)
 
-        total_sales = branch_df['Revenue'].sum()
-        total_expenses = branch_df['Expense'].sum() + branch_df['Salary'].sum()
-        net_income = total_sales - total_expenses
+        totals = overview['kpis']
+        total_sales = totals['total_sales']
+        total_expenses = totals['total_expenses']
+        net_income = totals['net_income']
         avg_customer_rating = 4.69  # Placeholder for branch rating if available
-        total_employees = branch_df['EmployeeID'].nunique()
-        performance_ratio = total_sales / total_expenses if total_expenses > 0 else float('inf')
-        performance_status = "PW" if performance_ratio >= 3 else "NPW"
+        total_employees = totals['total_employees']
+        performance_ratio = totals['performance_ratio']
+        performance_status = totals['performance_status']
         perf_status_display = blinking_star() if performance_status == "PW" else ("⭐" if performance_ratio > 1 else "")
 
-        # Aggregate individual employee performance
-        agg_cols = ['EmployeeID', 'EmployeeName']
-        agg_df = branch_df.groupby(agg_cols).agg({
-            'Revenue': 'sum',
-            'Expense': 'sum',
-            'Salary': 'sum'
-        }).reset_index()
-
-        agg_df['Net Income'] = agg_df['Revenue'] - agg_df['Expense'] - agg_df['Salary']
-
-        agg_df['Performance Ratio'] = agg_df.apply(
-            lambda row: row['Revenue'] / (row['Expense'] + row['Salary']) if (row['Expense'] + row['Salary']) > 0 else float('inf'),
-            axis=1
-        )
-
-        # Employees needing review (performance ratio below 3)
-        needs_review_df = agg_df[agg_df['Performance Ratio'] < 3][['EmployeeID', 'EmployeeName']]
-
-        # Prepare display string for needs review employees
-        if not needs_review_df.empty:
-            needs_review_str = "\n".join(
-                f"- {row.EmployeeID}: {row.EmployeeName}" for row in needs_review_df.itertuples()
-            )
-        else:
-            needs_review_str = "None 🎉"
+        # Employees needing review (performance ratio below the threshold)
+        review_count = ranking.below_count('Performance Ratio', review_threshold, selected_branch)
 
         # Display branch overview metrics
         st.header(f"📍 Branch Overview: {selected_branch}")
@@ -310,25 +205,41 @@ if uploaded_employees and uploaded_branches and uploaded_transactions:
         col5.metric("Total Employees", f"{total_employees}")
         col6.metric("Performance Ratio", f"{performance_ratio:.2f}x")
         col7.markdown(f"**Performance Status:** {perf_status_display}", unsafe_allow_html=True)
-        col8.markdown(f"**Needs Review:**\n{needs_review_str}")
+        col8.metric("Needs Review", f"{review_count}")
+
+        st.markdown(f"### 🔎 Needs Review (ratio below {review_threshold:g}x)")
+        with stage("render: needs review"):
+            paginate_rows(
+                review_count,
+                lambda start, stop: employee_rows(
+                    ranking.below('Performance Ratio', review_threshold, selected_branch, start, stop), show_branch=False
+                ),
+                key=f"review_{selected_branch}",
+            )
 
         st.markdown("### 📈 Visualizations")
-        st.altair_chart(monthly_performance_for_branch_chart(branch_df, selected_branch), use_container_width=True)
+        with stage("chart: branch performance"):
+            chart = load_chart_cached(
+                data_key, ["branch", selected_branch],
+                lambda: monthly_performance_for_branch_chart(overview['monthly'], selected_branch)
+            )
+        with stage("render: branch performance"):
+            st.vega_lite_chart(chart, width="stretch")
 
         # Individual Employee Performance Table
         st.markdown("### 🧑‍💼 Individual Performance")
 
-        # Format currency for display
-        for col in ['Revenue', 'Expense', 'Salary', 'Net Income']:
-            agg_df[col] = agg_df[col].apply(lambda x: f"${x:,.0f}")
-
-        # Format status as rounded 'X' times or infinity
-        agg_df['Status'] = agg_df['Performance Ratio'].apply(lambda x: f"{x:.1f}x" if x != float('inf') else "∞")
-
-        # Drop raw Performance Ratio for cleaner display
-        agg_df = agg_df.drop(columns=['Performance Ratio'])
-
-        st.dataframe(agg_df.sort_values(by='Net Income', ascending=False))
+        # Ranked by the numeric Net Income; only the shown page is formatted
+        with stage("render: employee table"):
+            paginate_rows(
+                ranking.count(selected_branch),
+                lambda start, stop: employee_rows(
+                    ranking.ranked('Net Income', selected_branch, start, stop), show_branch=False
+                ),
+                key=f"employees_{selected_branch}",
+            )
 
 else:
     st.warning("Please upload all three CSV files in the sidebar to proceed.")
+
+profile_panel(tracer)
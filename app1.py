@@ -1,14 +1,23 @@
-import pandas as pd
 import streamlit as st
-import altair as alt
-from io import StringIO
+
+import metrics
+from data_cache import (
+    attach_session, load_date_index_cached, load_export_cached, load_summary_cached, open_dataset, pivot_cache,
+    selection_key
+)
+from data_loader import INGEST_MODES
+from date_index import DATE_PRESETS, preset_range, range_summary
+from exports import EXPORT_FORMATS, export_file_name, export_mime
+from panels import append_panel, datasets_panel, memory_panel, profile_panel, rejected_panel, start_profiling
+from profiling import stage
+from summary_view import paginate_summary
 
 st.set_page_config(page_title="Branch Performance Dashboard", layout="wide")
 st.title("📊 Company Overview")
 
 # --- Blinking star function ---
-def blinking_star():
-    blinking_css = """
+# The CSS is injected once per page; each star is just a span using it.
+BLINKING_CSS = """
     <style>
     @keyframes blink {
         0% { opacity: 1; }
@@ -23,113 +32,101 @@ def blinking_star():
     }
     </style>
     """
-    st.markdown(blinking_css, unsafe_allow_html=True)
-    return '<span class="blink">⭐✨</span>'
-
-# --- Performance Status Display (with Star) ---
-def performance_status_display(ratio):
-    if ratio >= 3:
-        return blinking_star()  # Blinking star for PW
-    elif ratio > 1:
-        return "⭐"  # Single star for NPW with ratio > 1
-    else:
-        return ""  # No star for NPW with ratio <= 1
+
+def blinking_star():
+    return metrics.BLINKING_STAR
+
+st.markdown(BLINKING_CSS, unsafe_allow_html=True)
 
 # --- Sidebar: File Uploads ---
 st.sidebar.header("📤 Upload CSV Files")
 
 uploaded_employees = st.sidebar.file_uploader("Upload Employees CSV", type="csv")
 uploaded_branches = st.sidebar.file_uploader("Upload Branches CSV", type="csv")
-uploaded_transactions = st.sidebar.file_uploader("Upload Transactions CSV", type="csv")
-
-# --- Function to Load and Process Data ---
-def load_data(emp_file, branch_file, trans_file):
-    employees = pd.read_csv(emp_file)
-    branches = pd.read_csv(branch_file)
-    transactions = pd.read_csv(trans_file)
-
-    # Merge datasets
-    emp_branch = pd.merge(employees, branches, on='BranchID', how='left')
-    df = pd.merge(transactions, emp_branch, on='EmployeeID', how='left')
-
-    # Parse dates
-    df['Date'] = pd.to_datetime(df['Date'])
-    df['Year'] = df['Date'].dt.year
-    df['Month'] = df['Date'].dt.month
-
-    # Pivot table by transaction type
-    pivot_df = df.pivot_table(
-        index=['EmployeeID', 'EmployeeName', 'BranchName', 'Year', 'Month'],
-        columns='Type',
-        values='Amount',
-        aggfunc='sum',
-        fill_value=0
-    ).reset_index()
-
-    # Flatten columns
-    pivot_df.columns = ['_'.join(col).strip() if isinstance(col, tuple) else col for col in pivot_df.columns.values]
-
-    # Clean and compute Net Income
-    pivot_df['BranchName'] = pivot_df['BranchName'].astype(str)
-    for col in ['Revenue', 'Expense', 'Salary']:
-        if col not in pivot_df.columns:
-            pivot_df[col] = 0
-        else:
-            pivot_df[col] = pd.to_numeric(pivot_df[col], errors='coerce').fillna(0)
-
-    pivot_df['Net Income'] = pivot_df['Revenue'] - pivot_df['Expense'] - pivot_df['Salary']
-
-    return pivot_df
+# Several files (monthly or regional shards) are aggregated in parallel worker processes
+uploaded_transactions = st.sidebar.file_uploader("Upload Transactions CSV", type="csv", accept_multiple_files=True)
+ingest_mode = st.sidebar.selectbox("Ingest mode", list(INGEST_MODES))
+tracer = start_profiling()
+
+# --- If all files uploaded (or a snapshot data directory is configured) ---
+with stage("load"):
+    data_key, df = open_dataset(
+        uploaded_employees, uploaded_branches, uploaded_transactions, by_date=True,
+        **INGEST_MODES[ingest_mode]
+    )
+
+if df is not None:
+    rejected_panel(data_key)
+
+    # Fold any delta transaction files into the loaded data
+    with stage("append"):
+        data_key, df = append_panel(
+            data_key, df, uploaded_employees, uploaded_branches, uploaded_transactions, by_date=True
+        )
 
-# --- If all files uploaded ---
-if uploaded_employees and uploaded_branches and uploaded_transactions:
-    df = load_data(uploaded_employees, uploaded_branches, uploaded_transactions)
+    # Hold the shared dataset for this session so other sessions' loads evict it last
+    attach_session(st.session_state, data_key)
+    memory_panel({"Pivot frame": df})
+    datasets_panel()
+    with stage("date index"):
+        date_index = load_date_index_cached(df, data_key)
+    cache_stats = pivot_cache.stats()
+    st.sidebar.caption(f"Load cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
 
     # Prepare filter values
-    years = sorted(df['Year'].dropna().unique())
-    months = sorted(df['Month'].dropna().unique())
-    branches = sorted(df['BranchName'].dropna().unique())
-    employees = sorted(df['EmployeeName'].dropna().unique())
-    month_names = {1:"Jan", 2:"Feb", 3:"Mar", 4:"Apr", 5:"May", 6:"Jun",
-                   7:"Jul", 8:"Aug", 9:"Sep", 10:"Oct", 11:"Nov", 12:"Dec"}
+    first_date, last_date = date_index.date_bounds()
+    branches = sorted(date_index.employees['BranchName'].unique())
+    employees = sorted(date_index.employees['EmployeeName'].unique())
 
     # --- Sidebar Filters ---
     st.sidebar.header("📅 Filters")
-    selected_year = st.sidebar.selectbox("Select Year", ["All"] + [str(year) for year in years], index=0)
-    selected_month = st.sidebar.selectbox("Select Month", ["All"] + [month_names[m] for m in months], index=0)
+    date_preset = st.sidebar.selectbox("Date Range", DATE_PRESETS, index=0)
+    if date_preset == "Custom":
+        picked = st.sidebar.date_input(
+            "Select Dates", value=(first_date, last_date), min_value=first_date, max_value=last_date
+        )
+        # While picking, only the start date is set
+        start_date, end_date = (picked[0], picked[-1]) if picked else (first_date, last_date)
+    else:
+        start_date, end_date = preset_range(date_preset, first_date, last_date)
+        st.sidebar.caption(f"{start_date:%d %b %Y} – {end_date:%d %b %Y}")
     selected_branches = st.sidebar.multiselect("Select Branch(es)", branches, default=branches)
     selected_employees = st.sidebar.multiselect("Select Employee(s)", employees, default=employees)
 
     # --- Fetch Data Button ---
     fetch_data = st.sidebar.button("🔍 Fetch Data")
+    export_format = st.sidebar.selectbox("Export format", list(EXPORT_FORMATS))
 
+    # Remember the fetched filters so paging and sorting reruns keep showing them
     if fetch_data:
-        filtered_df = df.copy()
-
-        # Apply filters
-        if selected_year != "All":
-            filtered_df = filtered_df[filtered_df['Year'] == int(selected_year)]
-
-        if selected_month != "All":
-            month_num = [k for k, v in month_names.items() if v == selected_month][0]
-            filtered_df = filtered_df[filtered_df['Month'] == month_num]
-
-        if selected_branches:
-            filtered_df = filtered_df[filtered_df['BranchName'].isin(selected_branches)]
-
-        if selected_employees:
-            filtered_df = filtered_df[filtered_df['EmployeeName'].isin(selected_employees)]
-
-        # Net income recalculation
-        filtered_df['Net Income'] = filtered_df['Revenue'] - filtered_df['Expense'] - filtered_df['Salary']
+        st.session_state['fetched_filters'] = (data_key, start_date, end_date, selected_branches, selected_employees)
+
+    fetched_filters = st.session_state.get('fetched_filters')
+    if fetched_filters and fetched_filters[0] == data_key:
+        _, start_date, end_date, selected_branches, selected_employees = fetched_filters
+        filters_key = selection_key(start_date, end_date, selected_branches, selected_employees)
+
+        # Range totals from the date index's prefix sums, without scanning the rows;
+        # kept per filter combination, so paging and sorting reruns do not recompute them
+        def build_summary():
+            totals, branch_summary, emp_branch_summary = range_summary(
+                date_index, start_date, end_date, selected_branches, selected_employees
+            )
+            return (
+                totals, metrics.add_performance_columns(branch_summary),
+                metrics.add_performance_columns(emp_branch_summary)
+            )
+
+        with stage("range summary"):
+            totals, branch_summary, emp_branch_summary = load_summary_cached(data_key, filters_key, build_summary)
 
         # --- Metrics ---
-        total_sales = filtered_df['Revenue'].sum()
-        total_expenses = filtered_df['Expense'].sum() + filtered_df['Salary'].sum()
-        net_income = total_sales - total_expenses
+        total_sales = totals['total_sales']
+        total_expenses = totals['total_expenses']
+        net_income = totals['net_income']
         avg_customer_rating = 4.69
-        total_branches = filtered_df['BranchName'].nunique()
-        total_employees = filtered_df['EmployeeID'].nunique()
+        total_branches = totals['total_branches']
+        total_employees = totals['total_employees']
 
         if total_expenses > 0:
             performance_ratio = total_sales / total_expenses
@@ -160,77 +157,67 @@ if uploaded_employees and uploaded_branches and uploaded_transactions:
 
         # --- Branch Summary (Formatted as Company Overview) ---
         st.subheader("📍 Summary by Branch")
-        branch_summary = filtered_df.groupby("BranchName")[['Expense', 'Revenue', 'Salary', 'Net Income']].sum().reset_index()
-
-        # Calculate total unique employees per branch
-        emp_count = filtered_df.groupby("BranchName")['EmployeeID'].nunique().reset_index().rename(columns={'EmployeeID': 'Total Employees'})
-
-        # Merge employee count into branch summary
-        branch_summary = branch_summary.merge(emp_count, on='BranchName', how='left')
-
-        # Calculate Performance Ratio and Status
-        branch_summary['Performance Ratio'] = branch_summary.apply(
-            lambda row: row['Revenue'] / (row['Expense'] + row['Salary']) if (row['Expense'] + row['Salary']) > 0 else float('inf'),
-            axis=1
+        # Show formatted metrics for the visible page of branches
+        branch_page = paginate_summary(
+            branch_summary, "branch_summary", "BranchName",
+            ["Revenue", "Net Income", "Performance Ratio", "Total Employees"]
         )
-
-        # Apply performance status function for stars
-        branch_summary['Performance Status'] = branch_summary['Performance Ratio'].apply(
-            lambda ratio: performance_status_display(ratio)
-        )
-
-        # Show formatted metrics for each branch
-        for index, row in branch_summary.iterrows():
-            with st.container():
-                col1, col2, col3, col4 = st.columns(4)
-                col1.metric(f"Total Sales ({row['BranchName']})", f"${row['Revenue']:,.0f}")
-                col2.metric(f"Total Expenses ({row['BranchName']})", f"${row['Expense'] + row['Salary']:,.0f}")
-                col3.metric(f"Net Income ({row['BranchName']})", f"${row['Net Income']:,.0f}")
-                col4.metric(f"Total Employees ({row['BranchName']})", row['Total Employees'])
-
-                col5, col6, col7 = st.columns(3)
-                col5.metric(f"Performance Ratio ({row['BranchName']})", f"{row['Performance Ratio']:.2f}x")
-                col6.markdown(f"**Performance Status:** {row['Performance Status']}", unsafe_allow_html=True)
+        with stage("render: branch cards"):
+            for index, row in branch_page.iterrows():
+                with st.container():
+                    col1, col2, col3, col4 = st.columns(4)
+                    col1.metric(f"Total Sales ({row['BranchName']})", f"${row['Revenue']:,.0f}")
+                    col2.metric(f"Total Expenses ({row['BranchName']})", f"${row['Expense'] + row['Salary']:,.0f}")
+                    col3.metric(f"Net Income ({row['BranchName']})", f"${row['Net Income']:,.0f}")
+                    col4.metric(f"Total Employees ({row['BranchName']})", row['Total Employees'])
+
+                    col5, col6, col7 = st.columns(3)
+                    col5.metric(f"Performance Ratio ({row['BranchName']})", f"{row['Performance Ratio']:.2f}x")
+                    col6.markdown(f"**Performance Status:** {row['Performance Status']}", unsafe_allow_html=True)
 
         # --- Download Raw Data Button ---
-        csv = filtered_df.to_csv(index=False)
-        st.download_button("Download Raw Data (CSV)", csv, file_name="filtered_data.csv", mime="text/csv")
+        # Encoded only when clicked, then kept for this filter combination and format
+        st.download_button(
+            f"Download Raw Data ({export_format})",
+            lambda: load_export_cached(
+                data_key, ["filtered", filters_key], export_format,
+                lambda: date_index.rows(start_date, end_date, date_index.select(selected_branches, selected_employees))
+            ),
+            file_name=export_file_name("filtered_data", export_format), mime=export_mime(export_format)
+        )
 
         st.markdown("---")
 
         # --- Employee Summary (Formatted as Company Overview) ---
         st.subheader("🧑‍💼 Summary by Employee")
-        emp_branch_summary = filtered_df.groupby(["EmployeeName", "BranchName"])[['Expense', 'Revenue', 'Salary', 'Net Income']].sum().reset_index()
-
-        # Calculate Performance Ratio for each employee
-        emp_branch_summary['Performance Ratio'] = emp_branch_summary.apply(
-            lambda row: row['Revenue'] / (row['Expense'] + row['Salary']) if (row['Expense'] + row['Salary']) > 0 else float('inf'),
-            axis=1
-        )
-
-        # Apply performance status function for stars
-        emp_branch_summary['Performance Status'] = emp_branch_summary['Performance Ratio'].apply(
-            lambda ratio: performance_status_display(ratio)
+        # Show formatted metrics for the visible page of employees
+        emp_page = paginate_summary(
+            emp_branch_summary, "employee_summary", "EmployeeName",
+            ["BranchName", "Revenue", "Net Income", "Performance Ratio"]
         )
-
-        # Show formatted metrics for each employee
-        for index, row in emp_branch_summary.iterrows():
-            with st.container():
-                col1, col2, col3, col4 = st.columns(4)
-                col1.metric(f"Total Sales ({row['EmployeeName']})", f"${row['Revenue']:,.0f}")
-                col2.metric(f"Total Expenses ({row['EmployeeName']})", f"${row['Expense'] + row['Salary']:,.0f}")
-                col3.metric(f"Net Income ({row['EmployeeName']})", f"${row['Net Income']:,.0f}")
-                col4.metric(f"Branch ({row['EmployeeName']})", row['BranchName'])
-
-                col5, col6, col7 = st.columns(3)
-                col5.metric(f"Performance Ratio ({row['EmployeeName']})", f"{row['Performance Ratio']:.2f}x")
-                col6.markdown(f"**Performance Status:** {row['Performance Status']}", unsafe_allow_html=True)
+        with stage("render: employee cards"):
+            for index, row in emp_page.iterrows():
+                with st.container():
+                    col1, col2, col3, col4 = st.columns(4)
+                    col1.metric(f"Total Sales ({row['EmployeeName']})", f"${row['Revenue']:,.0f}")
+                    col2.metric(f"Total Expenses ({row['EmployeeName']})", f"${row['Expense'] + row['Salary']:,.0f}")
+                    col3.metric(f"Net Income ({row['EmployeeName']})", f"${row['Net Income']:,.0f}")
+                    col4.metric(f"Branch ({row['EmployeeName']})", row['BranchName'])
+
+                    col5, col6, col7 = st.columns(3)
+                    col5.metric(f"Performance Ratio ({row['EmployeeName']})", f"{row['Performance Ratio']:.2f}x")
+                    col6.markdown(f"**Performance Status:** {row['Performance Status']}", unsafe_allow_html=True)
 
         # --- Download Raw Data Button for Employee Summary ---
-        csv = emp_branch_summary.to_csv(index=False)
-        st.download_button("Download Raw Data (Employee Summary) CSV", csv, file_name="employee_summary_data.csv", mime="text/csv")
+        st.download_button(
+            f"Download Raw Data (Employee Summary) {export_format}",
+            lambda: load_export_cached(data_key, ["employee_summary", filters_key], export_format, lambda: emp_branch_summary),
+            file_name=export_file_name("employee_summary_data", export_format), mime=export_mime(export_format)
+        )
 
     else:
         st.info("👈 Use the filters and click **Fetch Data** to update the dashboard.")
 else:
     st.warning("🚨 Please upload all three CSV files in the sidebar to get started.")
+
+profile_panel(tracer)
@@ -0,0 +1,98 @@
+"""Compare the row-wise apply metrics with the vectorized metrics module.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_metrics --sizes 10000 100000 1000000 3000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+# --- The apply-based code the apps used before the metrics module ---
+def legacy_ratio(df):
+    return df.apply(
+        lambda row: row['Revenue'] / (row['Expense'] + row['Salary']) if (row['Expense'] + row['Salary']) > 0 else float('inf'),
+        axis=1
+    )
+
+def legacy_status(ratio):
+    return ratio.apply(lambda r: '<span class="blink">⭐✨</span>' if r >= 3 else ("⭐" if r > 1 else ""))
+
+def legacy_category(net_income):
+    return net_income.apply(lambda x: "Net Income (Good)" if x > 0 else "Net Income (Review)")
+
+def legacy_label(bar_df):
+    return bar_df.apply(lambda row: (
+        "Net Income (Good)" if row["Metric"] == "Net Income" and row["Net Income Category"] == "Net Income (Good)"
+        else "Net Income (Review)" if row["Metric"] == "Net Income"
+        else row["Metric"]
+    ), axis=1)
+
+def make_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Revenue': rng.gamma(2.0, 10_000, n).round(2),
+        'Expense': rng.gamma(2.0, 500, n).round(2),
+        'Salary': rng.gamma(2.0, 5_000, n).round(2),
+    })
+    # Some rows with no expenses to exercise the inf rule
+    df.loc[df.sample(frac=0.01, random_state=seed).index, ['Expense', 'Salary']] = 0
+    df['Net Income'] = df['Revenue'] - df['Expense'] - df['Salary']
+    return df
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+def run(n, include_legacy=True):
+    df = make_frame(n)
+    bar_df = pd.DataFrame({
+        'Metric': np.resize(np.array(["Revenue", "Total Expenses", "Net Income"], dtype=object), n),
+        'Net Income Category': metrics.net_income_category(df['Net Income']),
+    })
+    ratio = pd.Series(metrics.performance_ratio(df['Revenue'], df['Expense'], df['Salary']))
+    cases = [
+        ('ratio', legacy_ratio, (df,), metrics.performance_ratio, (df['Revenue'], df['Expense'], df['Salary'])),
+        ('status', legacy_status, (ratio,), metrics.status_display, (ratio,)),
+        ('category', legacy_category, (df['Net Income'],), metrics.net_income_category, (df['Net Income'],)),
+        ('label', legacy_label, (bar_df,), metrics.display_label, (bar_df['Metric'], bar_df['Net Income Category'])),
+    ]
+    rows = []
+    for name, legacy_fn, legacy_args, fast_fn, fast_args in cases:
+        fast_time, fast = timed(fast_fn, *fast_args)
+        legacy_time = None
+        if include_legacy:
+            legacy_time, legacy = timed(legacy_fn, *legacy_args)
+            assert np.array_equal(np.asarray(legacy), np.asarray(fast)), name
+        rows.append({
+            'rows': n,
+            'metric': name,
+            'apply_s': legacy_time,
+            'vectorized_s': fast_time,
+            'speedup': legacy_time / fast_time if legacy_time else None,
+        })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--skip-legacy-above', type=int, default=5_000_000,
+                        help="Only time the vectorized code for sizes above this row count")
+    parser.add_argument('--output', help="Optional CSV file for the results")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        results.extend(run(n, include_legacy=n <= args.skip_legacy_above))
+    table = pd.DataFrame(results)
+    print(table.to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+    if args.output:
+        table.to_csv(args.output, index=False)
+
+if __name__ == '__main__':
+    main()
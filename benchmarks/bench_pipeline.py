@@ -0,0 +1,156 @@
+"""Time and memory-profile every stage of both dashboards on synthetic data.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pipeline --sizes 10000 100000 1000000
+    python -m benchmarks.bench_pipeline --sizes 1000000 --baseline benchmarks/results/pipeline-abc1234.csv
+
+Datasets are generated once per size under --data-root and reused. Results are
+written to benchmarks/results/pipeline-<commit>.csv so runs of different versions
+can be compared with --baseline.
+"""
+import argparse
+import gc
+import os
+import subprocess
+import time
+import tracemalloc
+
+import pandas as pd
+
+import metrics
+from benchmarks.generate_data import generate
+from charts import (
+    chart_spec, financials_by_branch_chart, monthly_company_performance_chart, monthly_performance_for_branch_chart
+)
+from cube import build_cube, monthly_series
+from data_loader import build_pivot, build_pivot_star, load_data_streaming, read_tables, read_tables_arrow
+from date_index import DateRangeIndex, preset_range, range_summary
+from overview import branch_overview, kpi_overview
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+DATA_ROOT = os.path.join(os.path.dirname(__file__), 'data')
+PIVOT_MODES = ['standard', 'star', 'streaming']
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'local'
+
+def dataset(n, data_root, seed=0):
+    out_dir = os.path.join(data_root, f"{n}-seed{seed}")
+    paths = {
+        'employees': os.path.join(out_dir, 'employee.csv'),
+        'branches': os.path.join(out_dir, 'branch.csv'),
+        'transactions': os.path.join(out_dir, 'transactions.csv'),
+    }
+    if not all(os.path.exists(path) for path in paths.values()):
+        paths = generate(out_dir, n, seed=seed)
+    return paths
+
+# --- One timed, memory-traced stage ---
+class Recorder:
+    def __init__(self, size, trace_memory=True):
+        self.size = size
+        self.trace_memory = trace_memory
+        self.rows = []
+
+    def stage(self, app, name, fn, *args, **kwargs):
+        gc.collect()
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        peak = None
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+        self.rows.append({
+            'transactions': self.size,
+            'app': app,
+            'stage': name,
+            'seconds': elapsed,
+            'peak_mb': peak,
+            'rows_out': len(result) if isinstance(result, (pd.DataFrame, pd.Series)) else None,
+        })
+        return result
+
+def run(n, paths, modes=PIVOT_MODES, trace_memory=True):
+    rec = Recorder(n, trace_memory)
+    emp_file, branch_file, trans_file = paths['employees'], paths['branches'], paths['transactions']
+
+    employees, branches, transactions = rec.stage('both', 'read_tables', read_tables, emp_file, branch_file, trans_file)
+    rec.stage('both', 'read_tables_arrow', read_tables_arrow, emp_file, branch_file, trans_file)
+    # Both apps load the same daily pivot frame, so it is built once
+    pivots = {}
+    if 'standard' in modes:
+        pivots['standard'] = rec.stage('both', 'pivot_standard', build_pivot, employees, branches, transactions)
+    if 'star' in modes:
+        pivots['star'] = rec.stage('both', 'pivot_star', build_pivot_star, employees, branches, transactions)
+    if 'streaming' in modes:
+        pivots['streaming'] = rec.stage('both', 'load_streaming', load_data_streaming, emp_file, branch_file, trans_file)
+    pivot_df = next(iter(pivots.values()))
+    del pivots
+
+    app = 'app'
+    cube = rec.stage(app, 'build_cube', build_cube, pivot_df)
+    rec.stage(app, 'kpi_overview', kpi_overview, cube)
+    chart = rec.stage(app, 'chart_financials_build', financials_by_branch_chart, cube)
+    rec.stage(app, 'chart_financials_spec', chart_spec, chart)
+    monthly = rec.stage(app, 'monthly_series', monthly_series, cube)
+    chart = rec.stage(app, 'chart_company_build', monthly_company_performance_chart, monthly)
+    rec.stage(app, 'chart_company_spec', chart_spec, chart)
+    branch = cube['BranchName'].iloc[0]
+    overview = rec.stage(app, 'branch_overview', branch_overview, cube, branch)
+    chart = rec.stage(app, 'chart_branch_build', monthly_performance_for_branch_chart, overview['monthly'], branch)
+    rec.stage(app, 'chart_branch_spec', chart_spec, chart)
+    del cube
+
+    app = 'app1'
+    index = rec.stage(app, 'date_index', DateRangeIndex, pivot_df)
+    start, end = preset_range('Year to date', *index.date_bounds())
+    _, summary, _ = rec.stage(app, 'range_summary', range_summary, index, start, end)
+    rec.stage(app, 'performance_columns', metrics.add_performance_columns, summary)
+    selected = list(index.branch_names[: max(1, len(index.branch_names) // 2)])
+    rec.stage(app, 'range_summary_branches', range_summary, index, start, end, selected)
+    return rec.rows
+
+def compare(table, baseline_path):
+    baseline = pd.read_csv(baseline_path)
+    keys = ['transactions', 'app', 'stage']
+    merged = table.merge(baseline[keys + ['seconds', 'peak_mb']], on=keys, how='left', suffixes=('', '_baseline'))
+    merged['time_ratio'] = merged['seconds'] / merged['seconds_baseline']
+    merged['memory_ratio'] = merged['peak_mb'] / merged['peak_mb_baseline']
+    return merged
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--modes', nargs='+', choices=PIVOT_MODES, default=PIVOT_MODES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-root', default=DATA_ROOT, help="Where generated datasets are kept")
+    parser.add_argument('--no-memory', action='store_true', help="Skip tracemalloc, which slows some stages")
+    parser.add_argument('--output', help="Results CSV (default: benchmarks/results/pipeline-<commit>.csv)")
+    parser.add_argument('--baseline', help="Earlier results CSV to compare against")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        paths = dataset(n, args.data_root, args.seed)
+        results.extend(run(n, paths, args.modes, trace_memory=not args.no_memory))
+    table = pd.DataFrame(results)
+    table['revision'] = git_revision()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{table['revision'].iloc[0]}.csv")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    table.to_csv(output, index=False)
+
+    shown = compare(table, args.baseline) if args.baseline else table
+    print(shown.drop(columns='revision').to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+    print(f"Results written to {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Generate consistent employee, branch and transaction CSVs of any size.
+
+    python -m benchmarks.generate_data --transactions 1000000 --out data/1m
+    python -m benchmarks.generate_data --transactions 50000000 --branches 2000 --out data/50m
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+TYPES = np.array(['Revenue', 'Expense', 'Salary'])
+# Share of each transaction type, roughly as in the shipped sample
+TYPE_WEIGHTS = [0.4, 0.3, 0.3]
+# Gamma (shape, scale) of each type's amount
+AMOUNT_PARAMS = {'Revenue': (4.0, 6_000.0), 'Expense': (2.0, 350.0), 'Salary': (30.0, 390.0)}
+
+CHUNK_ROWS = 1_000_000
+
+# Defaults that scale the dimensions with the number of transactions
+def default_sizes(n_transactions, n_employees=None, n_branches=None):
+    n_employees = n_employees or max(12, n_transactions // 200)
+    n_branches = n_branches or max(4, n_employees // 25)
+    return n_employees, min(n_branches, n_employees)
+
+def generate(out_dir, n_transactions, n_employees=None, n_branches=None, months=24,
+             start='2023-01-01', seed=0, chunk_rows=CHUNK_ROWS):
+    n_employees, n_branches = default_sizes(n_transactions, n_employees, n_branches)
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+
+    branches = pd.DataFrame({
+        'BranchID': np.arange(1, n_branches + 1),
+        'BranchName': [f"Branch {i:04d}" for i in range(1, n_branches + 1)],
+    })
+    # Every branch gets at least one employee
+    branch_of = np.concatenate([np.arange(1, n_branches + 1), rng.integers(1, n_branches + 1, n_employees - n_branches)])
+    employees = pd.DataFrame({
+        'EmployeeID': np.arange(1, n_employees + 1),
+        'EmployeeName': [f"Employee {i:06d}" for i in range(1, n_employees + 1)],
+        'BranchID': rng.permutation(branch_of),
+    })
+    branches.to_csv(os.path.join(out_dir, 'branch.csv'), index=False)
+    employees.to_csv(os.path.join(out_dir, 'employee.csv'), index=False)
+
+    days = pd.date_range(start, periods=months, freq='MS')
+    all_days = pd.date_range(days[0], days[-1] + pd.offsets.MonthEnd(0), freq='D').strftime('%Y-%m-%d').to_numpy()
+
+    path = os.path.join(out_dir, 'transactions.csv')
+    written = 0
+    with open(path, 'w', newline='') as fh:
+        while written < n_transactions:
+            n = min(chunk_rows, n_transactions - written)
+            types = rng.choice(len(TYPES), size=n, p=TYPE_WEIGHTS)
+            amounts = np.empty(n)
+            for i, name in enumerate(TYPES):
+                mask = types == i
+                shape, scale = AMOUNT_PARAMS[name]
+                amounts[mask] = rng.gamma(shape, scale, mask.sum())
+            chunk = pd.DataFrame({
+                'TransactionID': np.arange(written + 1, written + n + 1),
+                'EmployeeID': rng.integers(1, n_employees + 1, n),
+                'Date': all_days[rng.integers(0, len(all_days), n)],
+                'Type': TYPES[types],
+                'Amount': amounts.round(2),
+            })
+            chunk.to_csv(fh, index=False, header=written == 0)
+            written += n
+
+    return {
+        'employees': os.path.join(out_dir, 'employee.csv'),
+        'branches': os.path.join(out_dir, 'branch.csv'),
+        'transactions': path,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic dashboard input CSVs.")
+    parser.add_argument('--transactions', type=int, default=100_000)
+    parser.add_argument('--employees', type=int, help="Default: one per 200 transactions")
+    parser.add_argument('--branches', type=int, help="Default: one per 25 employees")
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--start', default='2023-01-01')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True)
+    args = parser.parse_args()
+
+    paths = generate(args.out, args.transactions, args.employees, args.branches,
+                     months=args.months, start=args.start, seed=args.seed)
+    for path in paths.values():
+        print(path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""Load-test both dashboards with concurrent headless sessions on synthetic data.
+
+Run from the repository root:
+
+    python -m benchmarks.load_test --transactions 100000 --sessions 1 2 4 8 16
+    python -m benchmarks.load_test --apps app1.py --sessions 4 8 --interactions 20 --cold
+
+Each simulated manager is a Streamlit AppTest session in its own thread, so the
+sessions share the process-wide caches the way sessions of one server do. The
+generated CSVs are handed to the upload widgets, then every session keeps switching
+the overview (app.py) or changing filters and clicking Fetch Data (app1.py).
+Latency percentiles per interaction, throughput and process memory are written to
+benchmarks/results/load-<commit>.csv for every concurrency level.
+"""
+import argparse
+import io
+import os
+import random
+import resource
+import threading
+import time
+
+import pandas as pd
+from streamlit.delta_generator import DeltaGenerator
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.bench_pipeline import DATA_ROOT, RESULTS_DIR, dataset, git_revision
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = ['app.py', 'app1.py']
+# p95 latency a session should stay under
+TARGET_P95_SECONDS = 2.0
+# AppTest's per-run timeout; a cold load of a large dataset takes a while
+RUN_TIMEOUT = 600
+
+# --- Simulated uploads: the same bytes for every session ---
+_uploads = {}
+
+def simulated_file_uploader(self, label, *args, **kwargs):
+    for name, (file_name, data) in _uploads.items():
+        if label == f"Upload {name} CSV":
+            upload = io.BytesIO(data)
+            upload.name = file_name
+            return [upload] if kwargs.get('accept_multiple_files') else upload
+    return [] if kwargs.get('accept_multiple_files') else None
+
+def set_uploads(paths):
+    for name, key in (('Employees', 'employees'), ('Branches', 'branches'), ('Transactions', 'transactions')):
+        with open(paths[key], 'rb') as f:
+            _uploads[name] = (os.path.basename(paths[key]), f.read())
+    DeltaGenerator.file_uploader = simulated_file_uploader
+
+# --- Server-wide state AppTest keeps per run ---
+# AppTest sets and clears a mock Runtime around every run, so a session finishing its run
+# would clear it under sessions still running theirs; the last one set stays in place.
+# Each run also compiles the script anew, and concurrent compiles can fail (ast.parse is
+# not thread-safe on every Python version); the server compiles once into a shared cache.
+def share_server_state():
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    latest = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            latest[:] = [cls._instance]
+        if not latest:
+            raise RuntimeError("Runtime hasn't been created!")
+        return latest[0]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(latest))
+
+    compiled, lock = {}, threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def shared_bytecode(self, script_path):
+        with lock:
+            if script_path not in compiled:
+                compiled[script_path] = get_bytecode(self, script_path)
+            return compiled[script_path]
+
+    ScriptCache.get_bytecode = shared_bytecode
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        # Peak instead of current where /proc is not available (KB on Linux, bytes on macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+def clear_caches():
+    from data_cache import chart_cache, export_cache, pivot_cache
+    for cache in (pivot_cache, chart_cache, export_cache):
+        cache.clear()
+
+# --- One simulated manager ---
+def _widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+class Session:
+    def __init__(self, app, seed):
+        self.app = app
+        self.rng = random.Random(seed)
+        self.at = AppTest.from_file(os.path.join(ROOT, app), default_timeout=RUN_TIMEOUT)
+        self.samples = []
+
+    # Returns False when the interaction failed, in the app or in driving it
+    def _timed(self, interaction, action):
+        start = time.perf_counter()
+        try:
+            action()
+            error = [e.message for e in self.at.exception]
+        except Exception as exc:
+            error = [repr(exc)]
+        elapsed = time.perf_counter() - start
+        self.samples.append({'interaction': interaction, 'seconds': elapsed, 'error': '; '.join(error)})
+        return not error
+
+    def _switch_overview(self):
+        radio = _widget(self.at.sidebar.radio, "Choose Overview")
+        radio.set_value(self.rng.choice(radio.options)).run()
+
+    def _change_filters(self):
+        preset = _widget(self.at.sidebar.selectbox, "Date Range")
+        preset.set_value(self.rng.choice([p for p in preset.options if p != "Custom"]))
+        branches = _widget(self.at.sidebar.multiselect, "Select Branch(es)")
+        picked = self.rng.sample(branches.options, self.rng.randint(1, len(branches.options)))
+        branches.set_value(picked).run()
+
+    def _fetch(self):
+        _widget(self.at.sidebar.button, "🔍 Fetch Data").click().run()
+
+    def run(self, interactions):
+        if not self._timed('load', self.at.run):
+            return self.samples
+        for _ in range(interactions):
+            if self.app == 'app.py':
+                ok = self._timed('switch_overview', self._switch_overview)
+            else:
+                ok = self._timed('change_filters', self._change_filters) and self._timed('fetch_data', self._fetch)
+            if not ok:
+                break
+        return self.samples
+
+# --- Every session of one concurrency level at once ---
+def run_level(app, n_sessions, interactions, seed=0):
+    sessions = [Session(app, seed * 1000 + i) for i in range(n_sessions)]
+    threads = [threading.Thread(target=session.run, args=(interactions,)) for session in sessions]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    samples = pd.DataFrame([sample for session in sessions for sample in session.samples])
+    for error in samples.loc[samples['error'] != '', 'error'].unique():
+        print(f"{app}, {n_sessions} session(s): {error}")
+    return samples, wall
+
+def summarize(samples, wall, app, n_sessions, transactions):
+    rows = []
+    for interaction, group in samples.groupby('interaction', sort=False):
+        seconds = group['seconds']
+        rows.append({
+            'transactions': transactions,
+            'app': app,
+            'sessions': n_sessions,
+            'interaction': interaction,
+            'count': len(group),
+            'errors': int((group['error'] != '').sum()),
+            'p50_s': seconds.quantile(0.5),
+            'p95_s': seconds.quantile(0.95),
+            'p99_s': seconds.quantile(0.99),
+            'max_s': seconds.max(),
+            'throughput_per_s': len(samples) / wall,
+            'rss_mb': rss_mb(),
+        })
+    return rows
+
+# Largest session count whose every interaction other than the first load kept p95 under the target
+def capacity(table, target):
+    steady = table[table['interaction'] != 'load']
+    ok = steady.groupby(['app', 'sessions'])['p95_s'].max().le(target).reset_index()
+    return {app: int(group.loc[group['p95_s'], 'sessions'].max()) if group['p95_s'].any() else 0
+            for app, group in ok.groupby('app')}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--transactions', type=int, default=100_000)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--interactions', type=int, default=10, help="Interactions per session after the upload")
+    parser.add_argument('--apps', nargs='+', choices=APPS, default=APPS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-root', default=DATA_ROOT, help="Where generated datasets are kept")
+    parser.add_argument('--cold', action='store_true', help="Clear the shared caches before each level")
+    parser.add_argument('--target', type=float, default=TARGET_P95_SECONDS, help="p95 latency target in seconds")
+    parser.add_argument('--output', help="Results CSV (default: benchmarks/results/load-<commit>.csv)")
+    args = parser.parse_args()
+
+    set_uploads(dataset(args.transactions, args.data_root, args.seed))
+    share_server_state()
+    results = []
+    for app in args.apps:
+        for n_sessions in args.sessions:
+            if args.cold:
+                clear_caches()
+            samples, wall = run_level(app, n_sessions, args.interactions, args.seed)
+            results.extend(summarize(samples, wall, app, n_sessions, args.transactions))
+    table = pd.DataFrame(results)
+    table['revision'] = git_revision()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{table['revision'].iloc[0]}.csv")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    table.to_csv(output, index=False)
+
+    print(table.drop(columns='revision').to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+    for app, sessions in capacity(table, args.target).items():
+        print(f"{app}: up to {sessions} concurrent session(s) with p95 under {args.target:g}s")
+    print(f"Results written to {output}")
+
+if __name__ == '__main__':
+    main()
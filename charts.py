@@ -0,0 +1,125 @@
+import altair as alt
+import pandas as pd
+
+import metrics
+from cube import branch_summary
+
+# Branches drawn individually; the rest are summed into one "Other" bar
+TOP_BRANCHES = 25
+OTHER_BRANCHES = "Other"
+# Longer monthly histories are drawn by quarter, half-year or year
+MAX_PERIODS = 36
+PERIOD_BUCKETS = [(1, None), (3, 'Q'), (6, 'H'), (12, '')]
+
+# --- Chart data: exactly the rows and columns each chart plots ---
+def branch_financials(cube, top_n=TOP_BRANCHES):
+    summary = branch_summary(cube)[["BranchName", "Revenue", "Expense", "Salary"]]
+    summary["BranchName"] = summary["BranchName"].astype(str)
+    if top_n and len(summary) > top_n:
+        summary = summary.sort_values(["Revenue", "BranchName"], ascending=[False, True])
+        other = summary.iloc[top_n:][["Revenue", "Expense", "Salary"]].sum()
+        summary = pd.concat([
+            summary.iloc[:top_n].sort_values("BranchName"),
+            pd.DataFrame([{"BranchName": OTHER_BRANCHES, **other.to_dict()}]),
+        ], ignore_index=True)
+
+    summary["Total Expenses"] = summary["Expense"] + summary["Salary"]
+    summary["Net Income"] = summary["Revenue"] - summary["Total Expenses"]
+    summary["Net Income Category"] = metrics.net_income_category(summary["Net Income"])
+
+    bar_df = summary.melt(
+        id_vars=["BranchName", "Net Income Category"],
+        value_vars=["Revenue", "Total Expenses", "Net Income"],
+        var_name="Metric",
+        value_name="Amount"
+    )
+    bar_df["Display Label"] = metrics.display_label(bar_df["Metric"], bar_df["Net Income Category"])
+    return bar_df[["BranchName", "Metric", "Display Label", "Amount"]]
+
+def downsample_periods(monthly, max_periods=MAX_PERIODS):
+    for months, suffix in PERIOD_BUCKETS:
+        if len(monthly) / months <= max_periods:
+            break
+    if months == 1:
+        return monthly
+    year = monthly["Month_Year"].str[:4]
+    bucket = (monthly["Month_Year"].str[5:7].astype(int) - 1) // months + 1
+    label = year + ("-" + suffix + bucket.astype(str) if suffix else "")
+    return monthly.drop(columns="Month_Year").groupby(label.rename("Month_Year"), sort=True).sum().reset_index()
+
+def monthly_performance(monthly, max_periods=MAX_PERIODS):
+    monthly = downsample_periods(monthly, max_periods)
+    return pd.DataFrame({
+        "Month_Year": monthly["Month_Year"],
+        "Gross Sales": monthly["Revenue"],
+        "Total Expenses": monthly["Expense"] + monthly["Salary"],
+        "Net Sales": monthly["Revenue"] - monthly["Expense"] - monthly["Salary"],
+    })
+
+# --- Chart: Financials by Branch ---
+def financials_by_branch_chart(cube, top_n=TOP_BRANCHES):
+    bar_df = branch_financials(cube, top_n)
+
+    color_scale = alt.Scale(domain=[
+        "Net Income (Good)", "Net Income (Review)", "Total Expenses", "Revenue"
+    ], range=["#2ecc71", "#f1c40f", "#e74c3c", "#9b59b6"])
+
+    chart = alt.Chart(bar_df).mark_bar().encode(
+        x=alt.X("BranchName:N", title="Branch", axis=alt.Axis(labelAngle=-30),
+                sort=list(dict.fromkeys(bar_df["BranchName"]))),
+        y=alt.Y("Amount:Q", title="Amount ($)", stack=None),
+        color=alt.Color("Display Label:N", scale=color_scale, title="Metric"),
+        tooltip=["BranchName", "Metric", "Amount"],
+        xOffset='Display Label:N'
+    ).properties(
+        width=600,
+        height=400,
+        title="📊 Financials by Branch"
+    )
+
+    return chart
+
+# --- Monthly bars with a net sales line, from one small wide frame ---
+def _monthly_chart(monthly, title):
+    data = monthly_performance(monthly)
+
+    bar_color_scale = alt.Scale(
+        domain=["Gross Sales", "Total Expenses"],
+        range=["#9b59b6", "#e74c3c"]
+    )
+
+    bar_chart = alt.Chart().transform_fold(
+        ["Gross Sales", "Total Expenses"], as_=["Metric", "Amount"]
+    ).mark_bar().encode(
+        x=alt.X("Month_Year:N", title="Month", axis=alt.Axis(labelAngle=-45)),
+        y=alt.Y("Amount:Q", title="Amount ($)", stack=None),
+        color=alt.Color("Metric:N", scale=bar_color_scale, title=""),
+        xOffset="Metric:N",
+        tooltip=["Month_Year:N", "Metric:N", "Amount:Q"]
+    )
+
+    line_chart = alt.Chart().mark_line(point=alt.OverlayMarkDef(color="#2ecc71", filled=True)).encode(
+        x=alt.X("Month_Year:N"),
+        y=alt.Y("Net Sales:Q"),
+        color=alt.value("#2ecc71"),
+        tooltip=["Month_Year:N", "Net Sales:Q"]
+    )
+
+    return alt.layer(bar_chart, line_chart, data=data).properties(
+        width=700,
+        height=400,
+        title=title
+    )
+
+# --- Chart: 12-Month Company Performance ---
+def monthly_company_performance_chart(monthly):
+    return _monthly_chart(monthly, "📅 12-Month Company Performance")
+
+# --- Chart: 12-Month Branch Performance (filtered) ---
+def monthly_performance_for_branch_chart(monthly, branch_name):
+    return _monthly_chart(monthly, f"📅 12-Month Performance: {branch_name}")
+
+# --- Vega-Lite spec dict, ready to cache and hand to st.vega_lite_chart ---
+# Built once per view; Streamlit copies it before adding its own settings.
+def chart_spec(chart):
+    return chart.to_dict()
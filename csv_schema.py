@@ -0,0 +1,150 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv
+
+# Date format of the Date column; set DASHBOARD_DATE_FORMAT for files written differently
+DATE_FORMAT = os.environ.get('DASHBOARD_DATE_FORMAT', '%Y-%m-%d')
+TRANSACTION_TYPES = ['Revenue', 'Expense', 'Salary']
+# Bytes of CSV each parser thread takes at a time
+BLOCK_SIZE = 4 * 1024 ** 2
+
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+# --- Declared column types of the three input tables ---
+# Columns not listed here are never parsed.
+SCHEMAS = {
+    'employees': {'EmployeeID': pa.int64(), 'EmployeeName': CATEGORY, 'BranchID': pa.int64()},
+    'branches': {'BranchID': pa.int64(), 'BranchName': CATEGORY},
+    'transactions': {
+        'TransactionID': pa.int64(), 'EmployeeID': pa.int64(), 'Date': pa.timestamp('us'),
+        'Type': CATEGORY, 'Amount': pa.float64(),
+    },
+}
+
+REPORT_COLUMNS = ['Table', 'Line', 'Column', 'Value', 'Problem']
+
+INTEGER_PATTERN = r'^[+-]?\d+$'
+NUMBER_PATTERN = r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$'
+
+# Files are read from the start, however far an earlier read got
+def rewind(f):
+    if hasattr(f, 'seek'):
+        f.seek(0)
+    return f
+
+def _read(source, column_types, columns, use_threads):
+    return csv.read_csv(
+        rewind(source),
+        read_options=csv.ReadOptions(use_threads=use_threads, block_size=BLOCK_SIZE),
+        convert_options=csv.ConvertOptions(
+            column_types=column_types, include_columns=columns, timestamp_parsers=[DATE_FORMAT],
+            strings_can_be_null=True,
+        ),
+    )
+
+# --- Row-level checks on a column read as text ---
+# Each returns the parsed column (null where invalid) and the problem for invalid values.
+def _parse(values, dtype, column):
+    text = pc.utf8_trim_whitespace(values)
+    if pa.types.is_integer(dtype):
+        valid = pc.match_substring_regex(text, INTEGER_PATTERN)
+        problem = 'not an integer ID' if column.endswith('ID') else 'not an integer'
+    elif pa.types.is_floating(dtype):
+        valid = pc.match_substring_regex(text, NUMBER_PATTERN)
+        problem = 'not a number'
+    elif pa.types.is_timestamp(dtype):
+        parsed = pc.strptime(text, format=DATE_FORMAT, unit=dtype.unit, error_is_null=True)
+        return parsed, pc.is_null(parsed), f'not a date ({DATE_FORMAT})'
+    elif column == 'Type':
+        valid = pc.is_in(text, value_set=pa.array(TRANSACTION_TYPES))
+        problem = 'unknown type'
+    else:
+        return values, pc.is_null(values), 'missing'
+    valid = pc.fill_null(valid, False)
+    return pc.cast(pc.if_else(valid, text, None), dtype), pc.invert(valid), problem
+
+# lines maps row positions to data rows of the file when rows were dropped before the check
+def _report(table_name, mask, values, column, problem, lines=None):
+    rows = np.flatnonzero(mask.to_numpy(zero_copy_only=False))
+    return pd.DataFrame({
+        'Table': table_name,
+        # Line in the file, counting the header
+        'Line': (rows if lines is None else lines[rows]) + 2,
+        'Column': column,
+        'Value': pc.cast(pc.take(values, pa.array(rows)), pa.string()).to_pandas(),
+        'Problem': np.where(pc.take(pc.is_null(values), pa.array(rows)).to_numpy(zero_copy_only=False), 'missing', problem),
+    }, columns=REPORT_COLUMNS)
+
+def _validate(table, table_name, schema):
+    columns, bad, reports = {}, None, []
+    for column in table.column_names:
+        values = table[column].combine_chunks()
+        parsed, invalid, problem = _parse(values, schema[column], column)
+        if pc.any(invalid).as_py():
+            reports.append(_report(table_name, invalid, values, column, problem))
+            bad = invalid if bad is None else pc.or_(bad, invalid)
+        columns[column] = parsed
+    table, lines = pa.table(columns), None
+    if bad is not None:
+        keep = pc.invert(bad)
+        table = table.filter(keep)
+        lines = np.flatnonzero(keep.to_numpy(zero_copy_only=False))
+    return table.cast(pa.schema([(c, schema[c]) for c in table.column_names])), reports, lines
+
+# No missing values and no transaction types outside the known ones
+def _is_clean(table):
+    if any(column.null_count for column in table.columns):
+        return False
+    if 'Type' in table.column_names and table.num_rows:
+        types = table.unify_dictionaries()['Type'].chunk(0).dictionary.to_pylist()
+        return set(types) <= set(TRANSACTION_TYPES)
+    return True
+
+# --- Read one table with its declared schema, on every core ---
+# Clean files take the single typed pass. A file with bad values is read again as text and
+# checked row by row; the bad rows are dropped and listed in the report.
+# Returns the table, the report frames and the file rows kept (None when none were dropped).
+def read_table(source, table_name, columns=None, use_threads=True):
+    schema = SCHEMAS[table_name]
+    columns = list(columns or schema)
+    try:
+        table = _read(source, {c: schema[c] for c in columns}, columns, use_threads)
+        if _is_clean(table):
+            return table, [], None
+    except pa.ArrowInvalid as exc:
+        if 'CSV conversion error' not in str(exc):
+            raise
+    table = _read(source, {c: pa.string() for c in columns}, columns, use_threads)
+    return _validate(table, table_name, schema)
+
+# Rows referring to an ID the other table does not have; the merge drops them
+def _unknown_ids(table, table_name, column, known, lines):
+    if column not in table.column_names or column not in known.column_names:
+        return []
+    values = table[column].combine_chunks()
+    unknown = pc.invert(pc.fill_null(pc.is_in(values, value_set=known[column].combine_chunks()), False))
+    if not pc.any(unknown).as_py():
+        return []
+    return [_report(table_name, unknown, values, column, f'unknown {column}', lines)]
+
+# --- Read the three input tables with their declared schemas ---
+# columns maps a table name to the columns to read; by default every declared column.
+# Returns Arrow tables and a report of the rows that were dropped or do not join.
+def read_tables(emp_file, branch_file, trans_file, columns=None, use_threads=True):
+    columns = columns or {}
+    tables, lines, reports = {}, {}, []
+    for name, source in (('employees', emp_file), ('branches', branch_file), ('transactions', trans_file)):
+        tables[name], problems, lines[name] = read_table(source, name, columns.get(name), use_threads)
+        reports.extend(problems)
+    reports.extend(_unknown_ids(tables['employees'], 'employees', 'BranchID', tables['branches'], lines['employees']))
+    reports.extend(_unknown_ids(
+        tables['transactions'], 'transactions', 'EmployeeID', tables['employees'], lines['transactions']
+    ))
+    if not reports:
+        return tables['employees'], tables['branches'], tables['transactions'], pd.DataFrame(columns=REPORT_COLUMNS)
+    report = pd.concat(reports).sort_values(['Table', 'Line'], kind='stable', ignore_index=True)
+    return tables['employees'], tables['branches'], tables['transactions'], report
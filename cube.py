@@ -0,0 +1,51 @@
+import numpy as np
+
+from data_loader import TYPE_COLUMNS
+
+CUBE_KEYS = ['EmployeeID', 'EmployeeName', 'BranchName', 'Year', 'Month']
+CUBE_COLUMNS = ['Expense', 'Revenue', 'Salary']
+
+# --- Build the employee x month cube once per dataset ---
+# One row per employee and month, whatever the granularity of the pivot frame.
+def build_cube(pivot_df):
+    cube = pivot_df.groupby(CUBE_KEYS, sort=True, observed=True)[CUBE_COLUMNS].sum().reset_index()
+    cube['Net Income'] = cube['Revenue'] - cube['Expense'] - cube['Salary']
+    return cube
+
+# --- Slice the cube ---
+def branch_slice(cube, branch_name):
+    return cube[cube['BranchName'] == branch_name]
+
+# --- Roll-ups ---
+def kpi_totals(cube):
+    total_sales = cube['Revenue'].sum()
+    total_expenses = cube['Expense'].sum() + cube['Salary'].sum()
+    return {
+        'total_sales': total_sales,
+        'total_expenses': total_expenses,
+        'net_income': total_sales - total_expenses,
+        'total_branches': cube['BranchName'].nunique(),
+        'total_employees': cube['EmployeeID'].nunique(),
+    }
+
+def branch_summary(cube):
+    summary = cube.groupby('BranchName', observed=True)[CUBE_COLUMNS + ['Net Income']].sum().reset_index()
+    emp_count = cube.groupby('BranchName', observed=True)['EmployeeID'].nunique().rename('Total Employees')
+    return summary.merge(emp_count, left_on='BranchName', right_index=True, how='left')
+
+def employee_summary(cube, by=('EmployeeName', 'BranchName')):
+    return cube.groupby(list(by), observed=True)[CUBE_COLUMNS + ['Net Income']].sum().reset_index()
+
+def monthly_series(cube):
+    monthly = cube.groupby(['Year', 'Month'], observed=True)[TYPE_COLUMNS].sum().reset_index()
+    monthly.insert(0, 'Month_Year', monthly['Year'].astype(str) + '-' + monthly['Month'].astype(str).str.zfill(2))
+    return monthly.drop(columns=['Year', 'Month'])
+
+# --- Split branches into shards, one per worker task ---
+def shard_cube(cube, n_shards):
+    branches = np.array(sorted(cube['BranchName'].unique()), dtype=object)
+    shards = []
+    for names in np.array_split(branches, min(n_shards, len(branches)) or 1):
+        if len(names):
+            shards.append(cube[cube['BranchName'].isin(names)])
+    return shards
@@ -0,0 +1,510 @@
+import hashlib
+import os
+import sys
+import threading
+import weakref
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from charts import chart_spec
+from cube import build_cube
+from csv_schema import REPORT_COLUMNS
+import snapshot
+from data_loader import (
+    build_pivot, build_pivot_star, compact_pivot, load_data, read_dimensions, read_tables, read_tables_arrow
+)
+from date_index import DateRangeIndex
+from exports import export_bytes
+from incremental import append_transactions, merge_ids, read_delta, read_transaction_ids
+from ranking import RankingIndex
+from sharded_ingest import load_sharded
+
+# Memory budget shared by every cache of the server process; set DASHBOARD_MEMORY_BUDGET_MB to change it
+MAX_BYTES = int(os.environ.get('DASHBOARD_MEMORY_BUDGET_MB', 2048)) * 1024 ** 2
+
+# Entries each cache holds at most, whatever their size
+MAX_ENTRIES = 32
+# Serialized chart specs and prefetched branch overviews: small, but one per branch view
+MAX_CHART_SPECS = 4096
+MAX_BRANCH_VIEWS = 4096
+# Range summaries, one per recent filter combination in app1
+MAX_SUMMARIES = 64
+# Encoded downloads, one per filter combination and format
+MAX_EXPORTS = 16
+
+HASH_CHUNK = 1024 * 1024
+
+# --- Content hash of an uploaded file, file object or path ---
+def file_digest(f):
+    h = hashlib.sha256()
+    if hasattr(f, 'getvalue'):
+        h.update(f.getvalue())
+    elif hasattr(f, 'read'):
+        pos = f.tell()
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(chunk if isinstance(chunk, bytes) else chunk.encode())
+        f.seek(pos)
+    else:
+        with open(f, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(HASH_CHUNK), b''):
+                h.update(chunk)
+    return h.hexdigest()
+
+# Frames report their deep memory usage, text and exports their length; other cached
+# structures expose nbytes, and tuples, lists and dicts (such as chart specs) add up their parts
+def frame_nbytes(obj):
+    if isinstance(obj, (tuple, list)):
+        return sys.getsizeof(obj) + sum(frame_nbytes(part) for part in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(frame_nbytes(name) + frame_nbytes(part) for name, part in obj.items())
+    if hasattr(obj, 'memory_usage'):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (str, bytes)):
+        return len(obj)
+    if isinstance(obj, (int, float)):
+        return sys.getsizeof(obj)
+    return int(getattr(obj, 'nbytes', 0))
+
+# --- Sessions attached to each dataset ---
+class DatasetRefs:
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def attach(self, dataset):
+        with self._lock:
+            self._counts[dataset] += 1
+
+    def release(self, dataset):
+        with self._lock:
+            self._counts[dataset] -= 1
+            if self._counts[dataset] <= 0:
+                del self._counts[dataset]
+
+    def sessions(self, dataset):
+        with self._lock:
+            return self._counts.get(dataset, 0)
+
+    def in_use(self, dataset):
+        return self.sessions(dataset) > 0
+
+# One session's hold on a dataset, released when replaced or when the session state is collected
+class DatasetHandle:
+    def __init__(self, refs, dataset):
+        self.dataset = dataset
+        refs.attach(dataset)
+        self._release = weakref.finalize(self, refs.release, dataset)
+
+    def release(self):
+        self._release()
+
+# --- One memory budget for a set of caches ---
+# Caches join in the order they give up entries, cheapest to rebuild first. They share
+# one lock, so an insert into one cache can evict entries of the others.
+class MemoryBudget:
+    def __init__(self, max_bytes=MAX_BYTES, in_use=None):
+        self.max_bytes = max_bytes
+        self.in_use = in_use
+        self.caches = []
+        self.lock = threading.Lock()
+
+    # Bytes held by all caches; call with the lock held
+    def _used(self):
+        return sum(cache._bytes for cache in self.caches)
+
+    @property
+    def used(self):
+        with self.lock:
+            return self._used()
+
+    # Evicts one entry other than the inserted one, from the given caches or all of them.
+    # Datasets no session is attached to go first, then other datasets than the inserted
+    # entry's, since no session has attached to that one yet, then anything else.
+    def _evict(self, cache, inserted, caches=None):
+        caches = caches or self.caches
+        dataset = cache._entries[inserted][2]
+
+        def candidates():
+            for owner in caches:
+                for key, entry in owner._entries.items():
+                    if owner is not cache or key != inserted:
+                        yield owner, key, entry[2]
+
+        others = [(owner, key, ds) for owner, key, ds in candidates() if dataset is None or ds != dataset]
+        victim = None
+        if self.in_use is not None:
+            victim = next(((owner, key) for owner, key, ds in others if not self.in_use(ds)), None)
+        if victim is None:
+            victim = next(((owner, key) for owner, key, _ in others), None)
+        if victim is None:
+            victim = next(((owner, key) for owner, key, _ in candidates()), None)
+        if victim is None:
+            return False
+        owner, key = victim
+        owner._bytes -= owner._entries.pop(key)[1]
+        owner.evictions += 1
+        return True
+
+# --- LRU cache of built frames with an entry cap, inside a memory budget ---
+# Entries may be tagged with their dataset, which decides what the budget evicts first.
+# Concurrent builds of one key run once: later callers wait for the first build's result.
+# Hits and misses count the lookups made with count=True, the loads of pivot frames.
+class FrameCache:
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, in_use=None, budget=None):
+        self.max_entries = max_entries
+        self.budget = budget or MemoryBudget(max_bytes, in_use)
+        self.budget.caches.append(self)
+        self._entries = OrderedDict()
+        self._building = {}
+        self._bytes = 0
+        self._lock = self.budget.lock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, count=True):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += count
+                return None
+            self._entries.move_to_end(key)
+            self.hits += count
+            return self._entries[key][0]
+
+    # A frame larger than the whole budget is still kept, alone, until the next insert;
+    # otherwise every rerun that asks for it would build it again.
+    def put(self, key, df, dataset=None):
+        size = frame_nbytes(df)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (df, size, dataset)
+            self._bytes += size
+            while len(self._entries) > self.max_entries:
+                if not self.budget._evict(self, key, [self]):
+                    break
+            while self.budget._used() > self.budget.max_bytes:
+                if not self.budget._evict(self, key):
+                    break
+        return df
+
+    def get_or_build(self, key, build, dataset=None, count=True):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += count
+                return self._entries[key][0]
+            pending = self._building.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._building[key] = Future()
+                self.misses += count
+            else:
+                self.hits += count
+        if not owner:
+            return pending.result()
+        try:
+            df = self.put(key, build(), dataset)
+        except BaseException as exc:
+            pending.set_exception(exc)
+            raise
+        else:
+            pending.set_result(df)
+        finally:
+            with self._lock:
+                del self._building[key]
+        return df
+
+    # Entries and bytes held for each tagged dataset
+    def usage(self):
+        with self._lock:
+            usage = {}
+            for _, size, dataset in self._entries.values():
+                if dataset is not None:
+                    entries, total = usage.get(dataset, (0, 0))
+                    usage[dataset] = (entries + 1, total + size)
+            return usage
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+# Shared by every session in the Streamlit server process, within one memory budget.
+# Summaries and exports are rebuilt from cached frames, so they are evicted before the frames.
+dataset_refs = DatasetRefs()
+memory_budget = MemoryBudget(MAX_BYTES, in_use=dataset_refs.in_use)
+summary_cache = FrameCache(max_entries=MAX_SUMMARIES, budget=memory_budget)
+export_cache = FrameCache(max_entries=MAX_EXPORTS, budget=memory_budget)
+chart_cache = FrameCache(max_entries=MAX_CHART_SPECS, budget=memory_budget)
+branch_cache = FrameCache(max_entries=MAX_BRANCH_VIEWS, budget=memory_budget)
+pivot_cache = FrameCache(budget=memory_budget)
+
+# --- Cached load_data keyed on the uploaded bytes ---
+# Transactions may be one file or several shards; one shard is the same as one file.
+def transaction_files(trans_file):
+    if isinstance(trans_file, (list, tuple)) and len(trans_file) == 1:
+        return trans_file[0]
+    return trans_file
+
+def is_sharded(trans_file):
+    return isinstance(trans_file, (list, tuple))
+
+# Shards are hashed in any order, so uploading them in another order finds the same dataset
+def transactions_digest(trans_file):
+    if is_sharded(trans_file):
+        return hashlib.sha256(''.join(sorted(file_digest(f) for f in trans_file)).encode()).hexdigest()
+    return file_digest(trans_file)
+
+# The engine is part of the key: the Arrow engine drops rows the pandas engine keeps, so the same
+# files give different frames, rejected-rows reports and snapshots under each engine.
+def dataset_key(emp_file, branch_file, trans_file, engine='pandas'):
+    return (file_digest(emp_file), file_digest(branch_file), transactions_digest(trans_file), engine)
+
+# --- Build a pivot frame, going through the Parquet snapshot when there is one ---
+def _save(write, *args):
+    # A read-only or full disk only costs the next cold start its speed-up
+    try:
+        write(*args)
+    except OSError:
+        pass
+
+def build_pivot_from_snapshot(directory, by_date=True):
+    if snapshot.has_pivot(directory, by_date):
+        return compact_pivot(snapshot.read_pivot(directory, by_date))
+    pivot_df = build_pivot(*snapshot.read_tables(directory), by_date=by_date)
+    _save(snapshot.write_pivot, directory, pivot_df, by_date)
+    return pivot_df
+
+def build_pivot_from_uploads(emp_file, branch_file, trans_file, key, by_date=True, chunksize=None, star=False,
+                             engine='pandas'):
+    directory = snapshot.snapshot_dir(key)
+    if snapshot.has_pivot(directory, by_date) or snapshot.has_tables(directory):
+        return build_pivot_from_snapshot(directory, by_date)
+    if is_sharded(trans_file):
+        pivot_df, rejected = load_sharded(emp_file, branch_file, trans_file, by_date=by_date)
+        pivot_cache.put(key + ('rejected',), rejected, dataset=key)
+        if directory:
+            _save(snapshot.write_rejected, directory, rejected)
+    elif chunksize:
+        pivot_df = load_data(emp_file, branch_file, trans_file, by_date=by_date, chunksize=chunksize)
+    else:
+        if engine == 'arrow':
+            tables, rejected = read_tables_arrow(emp_file, branch_file, trans_file)
+            pivot_cache.put(key + ('rejected',), rejected, dataset=key)
+            if directory:
+                _save(snapshot.write_rejected, directory, rejected)
+        else:
+            tables = read_tables(emp_file, branch_file, trans_file)
+        pivot_df = (build_pivot_star if star else build_pivot)(*tables, by_date=by_date)
+        if directory:
+            _save(snapshot.write_tables, directory, *tables)
+    if directory:
+        _save(snapshot.write_pivot, directory, pivot_df, by_date)
+        _save(snapshot.prune_snapshots)
+    return pivot_df
+
+# Cached frames are shared between reruns and sessions, so callers must treat them as read-only.
+# The pandas ingest modes build the same frame from any files, so only the engine is part of the key.
+# Several transaction files are always aggregated shard by shard in worker processes.
+def load_data_cached(emp_file, branch_file, trans_file, by_date=True, chunksize=None, star=False, engine='pandas',
+                     key=None):
+    key = key or dataset_key(emp_file, branch_file, trans_file, engine)
+    return pivot_cache.get_or_build(
+        key + (by_date,),
+        lambda: build_pivot_from_uploads(
+            emp_file, branch_file, trans_file, key, by_date=by_date, chunksize=chunksize, star=star, engine=engine
+        ),
+        dataset=key
+    )
+
+# --- Uploaded files, or else the configured snapshot data directory ---
+def open_dataset(emp_file, branch_file, trans_file, by_date=True, chunksize=None, star=False, engine='pandas'):
+    trans_file = transaction_files(trans_file)
+    if emp_file and branch_file and trans_file:
+        key = dataset_key(emp_file, branch_file, trans_file, engine)
+        return key, load_data_cached(
+            emp_file, branch_file, trans_file, by_date=by_date, chunksize=chunksize, star=star, engine=engine, key=key
+        )
+    directory = snapshot.DATA_DIR
+    if snapshot.has_tables(directory) or snapshot.has_pivot(directory, by_date):
+        key = snapshot.directory_key(directory)
+        return key, pivot_cache.get_or_build(
+            key + (by_date,), lambda: build_pivot_from_snapshot(directory, by_date), dataset=key
+        )
+    return None, None
+
+# The employee x month cube only depends on the data, not on the pivot granularity.
+def load_cube_cached(pivot_df, key):
+    return pivot_cache.get_or_build(key + ('cube',), lambda: build_cube(pivot_df), dataset=key, count=False)
+
+# Date-range prefix sums over the daily pivot frame
+def load_date_index_cached(pivot_df, key):
+    return pivot_cache.get_or_build(key + ('dates',), lambda: DateRangeIndex(pivot_df), dataset=key, count=False)
+
+# Per-employee rankings for top-K and Needs Review queries
+def load_ranking_cached(cube, key):
+    return pivot_cache.get_or_build(key + ('ranking',), lambda: RankingIndex(cube), dataset=key, count=False)
+
+# Rows the Arrow engine or the sharded loader rejected while parsing the dataset. Their reports are
+# cached when the dataset is built, or read back from its snapshot; any other dataset has none.
+def rejected_rows(key):
+    report = pivot_cache.get(key + ('rejected',), count=False)
+    if report is not None:
+        return report
+    directory = snapshot.DATA_DIR if str(key[0]).startswith('dir:') else snapshot.snapshot_dir(key)
+    report = snapshot.read_rejected(directory)
+    if report is None:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    return pivot_cache.put(key + ('rejected',), report, dataset=key)
+
+# --- Delta transaction files appended to a loaded dataset ---
+# Each appended file extends the dataset key with its digest, so every version is its own
+# dataset in the caches and the next delta builds on the cached version before it.
+def append_key(key, delta_file):
+    return key + ('+' + file_digest(delta_file),)
+
+def _base_tables(key, emp_file, branch_file, trans_file):
+    directory = snapshot.snapshot_dir(key) if trans_file else snapshot.DATA_DIR
+    if snapshot.has_tables(directory):
+        return directory, None
+    if not trans_file:
+        raise ValueError("The data directory has no transaction table to check TransactionIDs against")
+    return None, (emp_file, branch_file, trans_file)
+
+def _loaded_ids(key, emp_file, branch_file, trans_file):
+    directory, uploads = _base_tables(key, emp_file, branch_file, trans_file)
+    if directory:
+        return np.sort(snapshot.read_transaction_ids(directory))
+    if is_sharded(uploads[2]):
+        return np.sort(np.concatenate([read_transaction_ids(f) for f in uploads[2]]))
+    return read_transaction_ids(uploads[2])
+
+def _dimensions(key, emp_file, branch_file, trans_file):
+    directory, uploads = _base_tables(key, emp_file, branch_file, trans_file)
+    if directory:
+        return snapshot.read_dimensions(directory)
+    return read_dimensions(*uploads[:2])
+
+def _append_batch(key, pivot_df, load_ids, delta_file, load_dimensions, by_date):
+    new_key = append_key(key, delta_file)
+
+    def build():
+        appended = append_transactions(
+            pivot_df, load_cube_cached(pivot_df, key), *load_dimensions(), load_ids(), delta_file, by_date=by_date
+        )
+        pivot_cache.put(new_key + ('ids',), appended['ids'], dataset=new_key)
+        pivot_cache.put(new_key + ('cube',), appended['cube'], dataset=new_key)
+        pivot_cache.put(new_key + ('appended',), {
+            'parent': key, 'rows': appended['rows'], 'months': appended['months'], 'branches': appended['branches'],
+        }, dataset=new_key)
+        return appended['pivot']
+
+    # The delta was checked when it was first appended; evicted IDs are merged back unchecked
+    def load_new_ids():
+        return pivot_cache.get_or_build(
+            new_key + ('ids',),
+            lambda: merge_ids(load_ids(), np.unique(read_delta(delta_file)['TransactionID'].to_numpy())),
+            dataset=new_key, count=False
+        )
+
+    return new_key, pivot_cache.get_or_build(new_key + (by_date,), build, dataset=new_key), load_new_ids
+
+# Yields (delta file, key, pivot frame) after each delta; a rejected delta raises ValueError
+# and the versions yielded before it stay valid.
+def append_batches(key, pivot_df, deltas, emp_file=None, branch_file=None, trans_file=None, by_date=True):
+    base_key = key
+    trans_file = transaction_files(trans_file)
+
+    def load_ids():
+        return pivot_cache.get_or_build(
+            base_key + ('ids',), lambda: _loaded_ids(base_key, emp_file, branch_file, trans_file), dataset=base_key,
+            count=False
+        )
+
+    def load_dimensions():
+        return _dimensions(base_key, emp_file, branch_file, trans_file)
+
+    for delta_file in deltas:
+        key, pivot_df, load_ids = _append_batch(key, pivot_df, load_ids, delta_file, load_dimensions, by_date)
+        yield delta_file, key, pivot_df
+
+# What an appended version changed: its parent key, rows, and the months and branches refreshed
+def appended_info(key):
+    return pivot_cache.get(key + ('appended',), count=False)
+
+# --- Chart specs, built once per dataset and view ---
+def load_chart_cached(key, view, build):
+    return chart_cache.get_or_build(key + ('chart',) + tuple(view), lambda: chart_spec(build()), dataset=key)
+
+# Reuse a view's spec from another version of the dataset; False when it is not cached
+def copy_chart_cached(source_key, key, view):
+    spec = chart_cache.get(source_key + ('chart',) + tuple(view))
+    if spec is None:
+        return False
+    chart_cache.put(key + ('chart',) + tuple(view), spec, dataset=key)
+    return True
+
+# --- Branch overviews prefetched in the background, one per dataset and branch ---
+def put_branch_view(key, branch, bundle):
+    branch_cache.put(key + ('branch', branch), bundle, dataset=key)
+
+# None when the view was never prefetched or has been evicted since
+def branch_view(key, branch):
+    return branch_cache.get(key + ('branch', branch), count=False)
+
+# --- Range summaries, kept per filter combination so paging and sorting reruns reuse them ---
+def load_summary_cached(key, filters_key, build):
+    return summary_cache.get_or_build(key + ('summary', filters_key), build, dataset=key)
+
+# --- Downloads, encoded on first request and kept per filter combination ---
+def selection_key(*selections):
+    return hashlib.sha256(repr(selections).encode()).hexdigest()
+
+def load_export_cached(key, view, fmt, build):
+    return export_cache.get_or_build(
+        key + ('export', fmt) + tuple(view), lambda: export_bytes(build(), fmt), dataset=key
+    )
+
+# --- Attach a session to the dataset it shows ---
+# state is the session's st.session_state; the handle lives there so a closed session releases it.
+def attach_session(state, key):
+    handle = state.get('dataset_handle')
+    if handle is not None and handle.dataset == key:
+        return handle
+    if handle is not None:
+        handle.release()
+    handle = state['dataset_handle'] = DatasetHandle(dataset_refs, key)
+    return handle
+
+# Short label for a dataset key: the start of each content hash, or the snapshot directory
+def dataset_label(key):
+    if key and str(key[0]).startswith('dir:'):
+        return key[0][4:]
+    return ' / '.join(str(part)[:8] for part in key)
+
+# --- Every dataset held in the caches, with its size and attached sessions ---
+def loaded_datasets():
+    rows = {}
+    for cache in memory_budget.caches:
+        for dataset, (entries, size) in cache.usage().items():
+            row = rows.setdefault(dataset, {'Dataset': dataset_label(dataset), 'Sessions': 0, 'Entries': 0, 'Bytes': 0})
+            row['Entries'] += entries
+            row['Bytes'] += size
+    for dataset, row in rows.items():
+        row['Sessions'] = dataset_refs.sessions(dataset)
+    frame = pd.DataFrame(list(rows.values()), columns=['Dataset', 'Sessions', 'Entries', 'Bytes'])
+    return frame.sort_values('Bytes', ascending=False, ignore_index=True)
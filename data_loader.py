@@ -0,0 +1,210 @@
+import pandas as pd
+
+from csv_schema import read_tables as read_typed_tables, rewind
+from profiling import stage
+from star_schema import StarSchema, aggregate_star
+
+TYPE_COLUMNS = ['Revenue', 'Expense', 'Salary']
+
+# Rows per transactions chunk in streaming mode
+DEFAULT_CHUNKSIZE = 500_000
+# Partial aggregates are compacted once this many have piled up
+COMPACT_EVERY = 8
+
+# --- Compact dtypes ---
+# Repeated strings become categories and IDs the narrowest integer that holds them.
+# Amounts stay float64: float32 drops cents on totals in the millions. With four float64
+# columns and the Date, the daily pivot ends up about 2x smaller than the original, not 4x.
+def downcast_ids(frame, columns):
+    for col in columns:
+        if col in frame.columns and pd.api.types.is_integer_dtype(frame[col]):
+            frame[col] = pd.to_numeric(frame[col], downcast='integer')
+    return frame
+
+def compact_pivot(pivot_df):
+    pivot_df = downcast_ids(pivot_df, ['EmployeeID'])
+    return pivot_df.astype({
+        'EmployeeName': 'category',
+        'BranchName': 'category',
+        'Year': 'int16',
+        'Month': 'int8',
+    })
+
+# The layout of the original load_data: names as text, IDs, Year and Month as 64- and 32-bit integers
+def expand_pivot(pivot_df):
+    return pivot_df.astype({
+        'EmployeeID': 'int64',
+        'EmployeeName': str,
+        'BranchName': str,
+        'Year': 'int32',
+        'Month': 'int32',
+    })
+
+def memory_report(frame):
+    usage = frame.memory_usage(deep=True, index=False)
+    return pd.DataFrame({
+        'Column': usage.index,
+        'Dtype': [str(frame[col].dtype) for col in usage.index],
+        'Bytes': usage.to_numpy(),
+    })
+
+# --- Read the three input tables ---
+# Employees and branches, which every ingest path joins the transactions with
+def read_dimensions(emp_file, branch_file):
+    employees = pd.read_csv(rewind(emp_file), dtype={'EmployeeName': 'category'})
+    branches = pd.read_csv(rewind(branch_file), dtype={'BranchName': 'category'})
+    return downcast_ids(employees, ['EmployeeID', 'BranchID']), downcast_ids(branches, ['BranchID'])
+
+def read_tables(emp_file, branch_file, trans_file):
+    with stage('read_csv'):
+        employees, branches = read_dimensions(emp_file, branch_file)
+        transactions = pd.read_csv(trans_file, dtype={'Type': 'category'})
+    downcast_ids(transactions, ['TransactionID', 'EmployeeID'])
+    return employees, branches, transactions
+
+# Categories in sorted order, as read_csv gives them, instead of order of appearance
+def sort_categories(frame):
+    for col in frame.select_dtypes('category').columns:
+        frame[col] = frame[col].cat.reorder_categories(frame[col].cat.categories.sort_values())
+    return frame
+
+# --- Arrow engine: declared schema, parsed on every core, bad rows reported ---
+# Returns the three tables and the report of rejected rows.
+def read_tables_arrow(emp_file, branch_file, trans_file, columns=None):
+    with stage('read_csv_arrow'):
+        *tables, rejected = read_typed_tables(emp_file, branch_file, trans_file, columns=columns)
+    with stage('to_pandas'):
+        employees, branches, transactions = (sort_categories(table.to_pandas()) for table in tables)
+    downcast_ids(employees, ['EmployeeID', 'BranchID'])
+    downcast_ids(branches, ['BranchID'])
+    downcast_ids(transactions, ['TransactionID', 'EmployeeID'])
+    return (employees, branches, transactions), rejected
+
+# --- Clean and compute Net Income ---
+def finish_pivot(pivot_df):
+    # Branch names are always labelled as text
+    pivot_df['BranchName'] = pivot_df['BranchName'].astype('category').cat.rename_categories(str)
+    for col in TYPE_COLUMNS:
+        if col not in pivot_df.columns:
+            pivot_df[col] = 0
+        else:
+            pivot_df[col] = pd.to_numeric(pivot_df[col], errors='coerce').fillna(0)
+
+    pivot_df['Net Income'] = pivot_df['Revenue'] - pivot_df['Expense'] - pivot_df['Salary']
+
+    return compact_pivot(pivot_df)
+
+# --- Merge and pivot into one row per employee/period ---
+def build_pivot(employees, branches, transactions, by_date=True):
+    # Merge datasets
+    with stage('merge'):
+        emp_branch = pd.merge(employees, branches, on='BranchID', how='left')
+        df = pd.merge(transactions, emp_branch, on='EmployeeID', how='left')
+
+    # Parse dates
+    with stage('to_datetime'):
+        df['Date'] = pd.to_datetime(df['Date'])
+        df['Year'] = df['Date'].dt.year
+        df['Month'] = df['Date'].dt.month
+
+    # Pivot table by transaction type
+    index = ['EmployeeID', 'EmployeeName', 'BranchName', 'Year', 'Month']
+    if by_date:
+        index.append('Date')
+    with stage('pivot_table'):
+        pivot_df = df.pivot_table(
+            index=index,
+            columns='Type',
+            values='Amount',
+            aggfunc='sum',
+            fill_value=0,
+            observed=True
+        ).reset_index()
+
+    # Flatten columns
+    pivot_df.columns = ['_'.join(col).strip() if isinstance(col, tuple) else col for col in pivot_df.columns.values]
+
+    with stage('finish_pivot'):
+        return finish_pivot(pivot_df)
+
+# --- Streaming ingest: aggregate transactions chunk by chunk ---
+def aggregate_keys(by_date=True):
+    return ['EmployeeID', 'Year', 'Month'] + (['Date'] if by_date else []) + ['Type']
+
+# Amount summed per employee, period and type for one chunk of transactions
+def aggregate_transactions(chunk, by_date=True):
+    chunk['Date'] = pd.to_datetime(chunk['Date'])
+    chunk['Year'] = chunk['Date'].dt.year
+    chunk['Month'] = chunk['Date'].dt.month
+    return chunk.groupby(aggregate_keys(by_date), sort=False)['Amount'].sum()
+
+def combine_aggregates(partials, by_date=True):
+    keys = aggregate_keys(by_date)
+    if not partials:
+        return pd.Series(dtype='float64', index=pd.MultiIndex.from_tuples([], names=keys), name='Amount')
+    combined = pd.concat(partials)
+    return combined.groupby(level=keys, sort=False).sum()
+
+def aggregate_transactions_chunked(trans_file, by_date=True, chunksize=DEFAULT_CHUNKSIZE):
+    partials = []
+    reader = pd.read_csv(trans_file, usecols=['EmployeeID', 'Date', 'Type', 'Amount'], chunksize=chunksize)
+    for chunk in reader:
+        partials.append(aggregate_transactions(chunk, by_date))
+        if len(partials) >= COMPACT_EVERY:
+            partials = [combine_aggregates(partials, by_date)]
+    return combine_aggregates(partials, by_date)
+
+def build_pivot_from_aggregates(employees, branches, sums, by_date=True):
+    # Attach names to the aggregated rows only, then drop unmatched ones like pivot_table does
+    emp_branch = pd.merge(employees, branches, on='BranchID', how='left')
+    wide = sums.unstack('Type', fill_value=0)
+    wide.columns.name = None
+    wide = wide.reindex(columns=sorted(wide.columns)).reset_index()
+    pivot_df = pd.merge(wide, emp_branch[['EmployeeID', 'EmployeeName', 'BranchName']], on='EmployeeID', how='inner')
+    pivot_df = pivot_df.dropna(subset=['EmployeeName', 'BranchName'])
+
+    index = ['EmployeeID', 'EmployeeName', 'BranchName', 'Year', 'Month'] + (['Date'] if by_date else [])
+    type_cols = [c for c in pivot_df.columns if c not in index]
+    pivot_df = pivot_df[index + type_cols].sort_values(index, ignore_index=True)
+
+    return finish_pivot(pivot_df)
+
+def load_data_streaming(emp_file, branch_file, trans_file, by_date=True, chunksize=DEFAULT_CHUNKSIZE):
+    with stage('read_csv'):
+        employees, branches = read_dimensions(emp_file, branch_file)
+    with stage('aggregate_chunks'):
+        sums = aggregate_transactions_chunked(trans_file, by_date=by_date, chunksize=chunksize)
+    with stage('merge_aggregates'):
+        return build_pivot_from_aggregates(employees, branches, sums, by_date=by_date)
+
+# --- Star-schema mode: aggregate on integer keys, no denormalizing merge ---
+def build_pivot_star(employees, branches, transactions, by_date=True):
+    with stage('star_schema'):
+        star = StarSchema(employees, branches, transactions)
+    with stage('aggregate_star'):
+        pivot_df = aggregate_star(star, by_date=by_date)
+    with stage('finish_pivot'):
+        return finish_pivot(pivot_df)
+
+# Keyword arguments for load_data behind each ingest mode offered in the sidebar
+INGEST_MODES = {
+    'Standard': {},
+    'Star schema': {'star': True},
+    'Streaming (large files)': {'chunksize': DEFAULT_CHUNKSIZE},
+    'Arrow CSV (multi-threaded)': {'engine': 'arrow'},
+}
+
+# --- Function to Load and Process Data ---
+# With a chunksize, transactions are streamed instead of read and merged in one go;
+# with star=True they are aggregated through the star schema. engine='arrow' parses the
+# CSVs with their declared schema and drops rows that fail validation.
+def load_data(emp_file, branch_file, trans_file, by_date=True, chunksize=None, star=False, engine='pandas'):
+    if chunksize:
+        return load_data_streaming(emp_file, branch_file, trans_file, by_date=by_date, chunksize=chunksize)
+    if engine == 'arrow':
+        (employees, branches, transactions), _ = read_tables_arrow(emp_file, branch_file, trans_file)
+    else:
+        employees, branches, transactions = read_tables(emp_file, branch_file, trans_file)
+    if star:
+        return build_pivot_star(employees, branches, transactions, by_date=by_date)
+    return build_pivot(employees, branches, transactions, by_date=by_date)
@@ -0,0 +1,189 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+
+VALUE_COLUMNS = ['Expense', 'Revenue', 'Salary']
+
+# First month of the fiscal year, e.g. DASHBOARD_FISCAL_YEAR_START=4 for April
+FISCAL_YEAR_START = int(os.environ.get('DASHBOARD_FISCAL_YEAR_START', 1))
+
+DATE_PRESETS = ['All time', 'Trailing 90 days', 'Quarter to date', 'Year to date', 'Fiscal year to date', 'Custom']
+
+# --- Prefix sums over rows sorted by (group, day) ---
+# Rows of one group form a contiguous, date-ordered run, so the totals of any
+# group over any day range are two binary searches and one subtraction.
+class RangeSums:
+    def __init__(self, groups, days, values):
+        self.order = np.lexsort((days, groups))
+        self.span = int(days.max()) + 2 if len(days) else 1
+        self.keys = groups[self.order].astype('int64') * self.span + days[self.order]
+        self.cum = np.zeros((len(days) + 1, values.shape[1]))
+        np.cumsum(values[self.order], axis=0, out=self.cum[1:])
+
+    def bounds(self, groups, start, end):
+        start, end = max(start, 0), min(end, self.span - 2)
+        base = np.asarray(groups, dtype='int64') * self.span
+        lo = np.searchsorted(self.keys, base + start, side='left')
+        hi = np.searchsorted(self.keys, base + end, side='right')
+        return lo, np.maximum(hi, lo)
+
+    def totals(self, groups, start, end):
+        lo, hi = self.bounds(groups, start, end)
+        return self.cum[hi] - self.cum[lo], hi - lo
+
+# --- Employee positions per dimension code ---
+# Positions sorted by code, so the employees with one code are one contiguous run.
+class PositionIndex:
+    def __init__(self, codes, n_codes):
+        self.positions = np.argsort(codes, kind='stable')
+        self.bounds = np.searchsorted(codes[self.positions], np.arange(n_codes + 1))
+
+    @property
+    def nbytes(self):
+        return self.positions.nbytes + self.bounds.nbytes
+
+    # Ascending positions of the employees with any of the codes
+    def lookup(self, codes):
+        runs = [self.positions[self.bounds[code]:self.bounds[code + 1]] for code in codes]
+        if not runs:
+            return self.positions[:0]
+        return np.sort(np.concatenate(runs))
+
+# Codes of the given labels; labels not in the index are left out
+def label_codes(labels, values):
+    codes = labels.get_indexer(values)
+    return np.unique(codes[codes >= 0])
+
+# --- Daily pivot frame indexed for date-range totals ---
+# Employees (ID, name and branch as in the pivot) and branches each get their
+# prefix sums; the whole company is one more group. Branch and employee names are
+# integer codes with a position index each, so a selection intersects two lookups.
+class DateRangeIndex:
+    def __init__(self, pivot_df):
+        keys = ['EmployeeID', 'EmployeeName', 'BranchName']
+        entity = pivot_df.groupby(keys, observed=True, sort=True).ngroup().to_numpy()
+        # The frame itself is not copied; row positions map back through by_employee.order
+        self.frame = pivot_df
+        all_days = pivot_df['Date'].to_numpy().astype('datetime64[D]').astype('int64')
+        self.first_day = int(all_days.min()) if len(all_days) else 0
+        days = all_days - self.first_day
+        values = pivot_df[VALUE_COLUMNS].to_numpy(dtype='float64')
+
+        first_rows = np.unique(entity, return_index=True)[1]
+        self.employees = pivot_df[keys].iloc[first_rows].reset_index(drop=True)
+        self.employees['BranchName'] = self.employees['BranchName'].astype(str)
+        self.employees['EmployeeName'] = self.employees['EmployeeName'].astype(str)
+        branch_codes, self.branch_names = pd.factorize(pivot_df['BranchName'].astype(str), sort=True)
+        self.employee_branch = self.branch_names.get_indexer(self.employees['BranchName'])
+        name_codes, self.employee_names = pd.factorize(self.employees['EmployeeName'], sort=True)
+        self.branch_positions = PositionIndex(self.employee_branch, len(self.branch_names))
+        self.name_positions = PositionIndex(name_codes, len(self.employee_names))
+
+        self.by_employee = RangeSums(entity, days, values)
+        self.by_branch = RangeSums(branch_codes, days, values)
+        self.company = RangeSums(np.zeros(len(days), dtype='int64'), days, values)
+
+    @property
+    def nbytes(self):
+        sums = (self.by_employee, self.by_branch, self.company)
+        positions = self.branch_positions.nbytes + self.name_positions.nbytes
+        return int(sum(s.keys.nbytes + s.cum.nbytes + s.order.nbytes for s in sums)) + positions
+
+    def date_bounds(self):
+        first = np.datetime64(self.first_day, 'D')
+        last = first + (self.by_employee.span - 2)
+        return first.astype(datetime.date), last.astype(datetime.date)
+
+    def _days(self, start, end):
+        return (np.datetime64(start, 'D').astype('int64') - self.first_day,
+                np.datetime64(end, 'D').astype('int64') - self.first_day)
+
+    # Employee positions in a branch/name selection; None or an empty list means no filter
+    def select(self, branches=None, employees=None):
+        selected = np.arange(len(self.employees))
+        if branches:
+            selected = self.branch_positions.lookup(label_codes(self.branch_names, branches))
+        if employees:
+            named = self.name_positions.lookup(label_codes(self.employee_names, employees))
+            selected = np.intersect1d(selected, named, assume_unique=True)
+        return selected
+
+    def employee_totals(self, start, end, selected):
+        sums, rows = self.by_employee.totals(selected, *self._days(start, end))
+        totals = self.employees.iloc[selected].reset_index(drop=True)
+        totals[VALUE_COLUMNS] = sums
+        totals['Rows'] = rows
+        return totals
+
+    def branch_totals(self, start, end, branch_codes):
+        sums, rows = self.by_branch.totals(branch_codes, *self._days(start, end))
+        totals = pd.DataFrame(sums, columns=VALUE_COLUMNS)
+        totals.insert(0, 'BranchName', self.branch_names[branch_codes])
+        totals['Rows'] = rows
+        return totals
+
+    def company_totals(self, start, end):
+        sums, rows = self.company.totals([0], *self._days(start, end))
+        return dict(zip(VALUE_COLUMNS, sums[0])), int(rows[0])
+
+    # Pivot rows of the selected employees within the range
+    def rows(self, start, end, selected):
+        lo, hi = self.by_employee.bounds(selected, *self._days(start, end))
+        lengths = hi - lo
+        positions = np.repeat(lo - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return self.frame.iloc[np.sort(self.by_employee.order[positions])]
+
+# --- Totals and summaries for a date range and branch/employee selection ---
+# Matches kpi_totals, branch_summary and employee_summary over the selected rows.
+def range_summary(index, start, end, branches=None, employees=None):
+    selected = index.select(branches, employees)
+    emp = index.employee_totals(start, end, selected)
+    emp['Net Income'] = emp['Revenue'] - emp['Expense'] - emp['Salary']
+    emp = emp[emp['Rows'] > 0]
+
+    staff = emp.groupby('BranchName', sort=True)['EmployeeID'].nunique().rename('Total Employees')
+    in_branches = index.select(branches)
+    if len(selected) == len(in_branches):
+        # Whole branches are selected, so their prefix sums answer directly
+        codes = np.unique(index.employee_branch[in_branches])
+        branch = index.branch_totals(start, end, codes)
+        branch = branch[branch['Rows'] > 0].drop(columns='Rows')
+    else:
+        branch = emp.groupby('BranchName', sort=True)[VALUE_COLUMNS].sum().reset_index()
+    branch['Net Income'] = branch['Revenue'] - branch['Expense'] - branch['Salary']
+    branch = branch.reset_index(drop=True)
+    branch['Total Employees'] = branch['BranchName'].map(staff)
+
+    if len(selected) == len(index.employees):
+        sums, _ = index.company_totals(start, end)
+    else:
+        sums = branch[VALUE_COLUMNS].sum().to_dict()
+    total_sales = sums['Revenue']
+    total_expenses = sums['Expense'] + sums['Salary']
+    kpis = {
+        'total_sales': total_sales,
+        'total_expenses': total_expenses,
+        'net_income': total_sales - total_expenses,
+        'total_branches': len(branch),
+        'total_employees': emp['EmployeeID'].nunique(),
+    }
+
+    employees_summary = emp.groupby(['EmployeeName', 'BranchName'], sort=True)[VALUE_COLUMNS + ['Net Income']].sum().reset_index()
+    return kpis, branch, employees_summary
+
+# --- Named ranges, relative to the latest date in the data ---
+def preset_range(preset, first, last, fiscal_start=FISCAL_YEAR_START):
+    if preset == 'Trailing 90 days':
+        start = last - datetime.timedelta(days=89)
+    elif preset == 'Quarter to date':
+        start = datetime.date(last.year, (last.month - 1) // 3 * 3 + 1, 1)
+    elif preset == 'Year to date':
+        start = datetime.date(last.year, 1, 1)
+    elif preset == 'Fiscal year to date':
+        year = last.year if last.month >= fiscal_start else last.year - 1
+        start = datetime.date(year, fiscal_start, 1)
+    else:
+        start = first
+    return max(start, first), last
@@ -0,0 +1,55 @@
+import gzip
+import io
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Rows encoded per step: the encoding is chunked, so no full-size CSV string or Arrow table is held
+EXPORT_CHUNK_ROWS = 100_000
+
+# Download format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'CSV (gzip)': ('csv.gz', 'application/gzip'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+def _write_csv(frame, raw, chunk_rows):
+    text = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        frame.iloc[start:start + chunk_rows].to_csv(text, index=False, header=start == 0)
+    text.flush()
+    text.detach()
+
+def _write_parquet(frame, raw, chunk_rows):
+    writer = None
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        table = pa.Table.from_pandas(frame.iloc[start:start + chunk_rows], preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(raw, table.schema)
+        writer.write_table(table.cast(writer.schema))
+    writer.close()
+
+# --- Encode a frame for download, chunk by chunk ---
+# The download is not streamed: the chunks go to a temporary file, which is read back
+# in one piece, so the returned bytes are the only full-size copy held in memory.
+def export_bytes(frame, fmt, chunk_rows=EXPORT_CHUNK_ROWS):
+    extension = EXPORT_FORMATS[fmt][0]
+    with tempfile.TemporaryFile() as spool:
+        if extension == 'parquet':
+            _write_parquet(frame, spool, chunk_rows)
+        elif extension == 'csv.gz':
+            # mtime=0 keeps the bytes identical for identical data
+            with gzip.GzipFile(fileobj=spool, mode='wb', mtime=0) as gz:
+                _write_csv(frame, gz, chunk_rows)
+        else:
+            _write_csv(frame, spool, chunk_rows)
+        spool.seek(0)
+        return spool.read()
+
+def export_file_name(stem, fmt):
+    return f"{stem}.{EXPORT_FORMATS[fmt][0]}"
+
+def export_mime(fmt):
+    return EXPORT_FORMATS[fmt][1]
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+from cube import CUBE_KEYS, build_cube
+from csv_schema import rewind
+from data_loader import build_pivot, downcast_ids
+from profiling import stage
+
+DELTA_COLUMNS = ['TransactionID', 'EmployeeID', 'Date', 'Type', 'Amount']
+# TransactionIDs listed in a rejection message
+SHOWN_DUPLICATES = 5
+
+class DuplicateTransactionsError(ValueError):
+    def __init__(self, duplicates):
+        self.duplicates = duplicates
+        shown = ', '.join(str(i) for i in duplicates[:SHOWN_DUPLICATES])
+        more = ', ...' if len(duplicates) > SHOWN_DUPLICATES else ''
+        super().__init__(f"{len(duplicates):,} TransactionID(s) already loaded or repeated: {shown}{more}")
+
+# --- Read a delta transactions file and the IDs it is checked against ---
+def read_delta(delta_file):
+    delta = pd.read_csv(rewind(delta_file), dtype={'Type': 'category'})
+    missing = [col for col in DELTA_COLUMNS if col not in delta.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    if delta.empty:
+        raise ValueError("No transactions to append")
+    return downcast_ids(delta, ['TransactionID', 'EmployeeID'])
+
+# Sorted, so each check is a binary search per delta row
+def read_transaction_ids(trans_file):
+    ids = pd.read_csv(rewind(trans_file), usecols=['TransactionID'])['TransactionID'].to_numpy()
+    return np.sort(ids)
+
+# --- Reject TransactionIDs already loaded or repeated within the delta ---
+# Returns the loaded IDs with the delta's merged in, still sorted.
+def check_new_ids(loaded_ids, delta_ids):
+    new_ids, counts = np.unique(delta_ids, return_counts=True)
+    duplicates = new_ids[counts > 1]
+    if len(loaded_ids):
+        pos = np.minimum(np.searchsorted(loaded_ids, new_ids), len(loaded_ids) - 1)
+        duplicates = np.union1d(duplicates, new_ids[loaded_ids[pos] == new_ids])
+    if len(duplicates):
+        raise DuplicateTransactionsError(duplicates.tolist())
+    return merge_ids(loaded_ids, new_ids)
+
+def merge_ids(loaded_ids, new_ids):
+    loaded_ids = loaded_ids.astype(np.result_type(loaded_ids, new_ids), copy=False)
+    return np.insert(loaded_ids, np.searchsorted(loaded_ids, new_ids), new_ids)
+
+# --- Fold delta rows into a pivot frame or cube ---
+# Only rows in the months the delta touches are regrouped; the rest are kept as they are
+# and the regrouped rows follow them.
+def _shared_categories(frames, columns):
+    for col in columns:
+        categories = frames[0][col].cat.categories
+        for frame in frames[1:]:
+            categories = categories.append(frame[col].cat.categories.difference(categories))
+        for frame in frames:
+            frame[col] = frame[col].cat.set_categories(categories)
+    return frames
+
+def fold_rows(base, delta, keys):
+    values = [col for col in base.columns if col not in keys and col != 'Net Income']
+    base_months = base['Year'].to_numpy(dtype='int32') * 12 + base['Month'].to_numpy()
+    delta_months = delta['Year'].to_numpy(dtype='int32') * 12 + delta['Month'].to_numpy()
+    touched = np.isin(base_months, np.unique(delta_months))
+
+    kept, regrouped = base[~touched].copy(), base[touched].copy()
+    delta = delta.reindex(columns=base.columns, fill_value=0)
+    kept, regrouped, delta = _shared_categories([kept, regrouped, delta], ['EmployeeName', 'BranchName'])
+    combined = pd.concat([regrouped, delta], ignore_index=True)
+    combined = combined.groupby(keys, observed=True, sort=True)[values].sum().reset_index()
+    combined['Net Income'] = combined['Revenue'] - combined['Expense'] - combined['Salary']
+
+    folded = pd.concat([kept, combined[base.columns]], ignore_index=True)
+    return downcast_ids(folded, ['EmployeeID'])
+
+# --- Append one delta transactions file to a loaded dataset ---
+# Cost follows the delta: only its rows are merged and pivoted, and only its months regrouped.
+def append_transactions(pivot_df, cube, employees, branches, loaded_ids, delta_file, by_date=True):
+    with stage('read_delta'):
+        delta = read_delta(delta_file)
+    with stage('check_ids'):
+        ids = check_new_ids(loaded_ids, delta['TransactionID'].to_numpy())
+    with stage('delta_pivot'):
+        delta_pivot = build_pivot(employees, branches, delta, by_date=by_date)
+    with stage('fold'):
+        keys = CUBE_KEYS + (['Date'] if by_date else [])
+        folded_pivot = fold_rows(pivot_df, delta_pivot, keys)
+        folded_cube = fold_rows(cube, build_cube(delta_pivot), CUBE_KEYS)
+
+    months = delta_pivot[['Year', 'Month']].drop_duplicates().sort_values(['Year', 'Month'])
+    return {
+        'pivot': folded_pivot,
+        'cube': folded_cube,
+        'ids': ids,
+        'rows': len(delta),
+        'months': [f"{year}-{month:02d}" for year, month in months.itertuples(index=False)],
+        'branches': sorted(delta_pivot['BranchName'].astype(str).unique()),
+    }
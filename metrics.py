@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+# Revenue must cover expenses and salary this many times to count as PW
+PW_THRESHOLD = 3
+
+BLINKING_STAR = '<span class="blink">⭐✨</span>'
+
+NET_INCOME_GOOD = "Net Income (Good)"
+NET_INCOME_REVIEW = "Net Income (Review)"
+
+# Whole-column helpers: every function takes Series/arrays (or scalars) and works
+# on the full column at once. Scalars in give scalars out.
+def _result(values):
+    values = np.asarray(values)
+    return values.item() if values.ndim == 0 else values
+
+# --- Core metrics ---
+def net_income(revenue, expense, salary):
+    return _result(
+        np.asarray(revenue, dtype='float64') - np.asarray(expense, dtype='float64') - np.asarray(salary, dtype='float64')
+    )
+
+def performance_ratio(revenue, expense, salary):
+    revenue = np.asarray(revenue, dtype='float64')
+    total_expenses = np.asarray(expense, dtype='float64') + np.asarray(salary, dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(total_expenses > 0, revenue / total_expenses, np.inf)
+    return _result(ratio)
+
+def performance_status(ratio):
+    return _result(np.where(np.asarray(ratio) >= PW_THRESHOLD, "PW", "NPW"))
+
+# Blinking star for PW, single star for NPW with ratio > 1, nothing otherwise
+def status_display(ratio):
+    ratio = np.asarray(ratio)
+    return _result(np.select([ratio >= PW_THRESHOLD, ratio > 1], [BLINKING_STAR, "⭐"], ""))
+
+def net_income_category(values):
+    return _result(np.where(np.asarray(values) > 0, NET_INCOME_GOOD, NET_INCOME_REVIEW))
+
+# Net Income bars are labelled with their category; other metrics keep their name
+def display_label(metric, category):
+    metric = np.asarray(metric, dtype=object)
+    return _result(np.where(metric == "Net Income", np.asarray(category, dtype=object), metric))
+
+def add_performance_columns(summary):
+    summary['Performance Ratio'] = performance_ratio(summary['Revenue'], summary['Expense'], summary['Salary'])
+    summary['Performance Status'] = status_display(summary['Performance Ratio'])
+    return summary
+
+# --- Display formatting ---
+# String formatting has no NumPy kernel; these run once per displayed column.
+def format_currency(values):
+    return pd.Series(values).map("${:,.0f}".format)
+
+def ratio_label(ratio):
+    ratio = pd.Series(ratio)
+    return ratio.map("{:.1f}x".format).where(ratio != np.inf, "∞")
@@ -0,0 +1,34 @@
+import metrics
+from cube import branch_slice, employee_summary, kpi_totals, monthly_series
+from ranking import REVIEW_THRESHOLD
+
+# --- KPIs for any slice of the cube (the company or one branch) ---
+def kpi_overview(cube):
+    totals = kpi_totals(cube)
+    totals['performance_ratio'] = metrics.performance_ratio(totals['total_sales'], totals['total_expenses'], 0)
+    totals['performance_status'] = metrics.performance_status(totals['performance_ratio'])
+    return totals
+
+# --- Per-employee performance with the Needs Review flag ---
+def employee_performance(cube, threshold=REVIEW_THRESHOLD):
+    agg_df = employee_summary(cube, by=['EmployeeID', 'EmployeeName'])
+    agg_df = agg_df[['EmployeeID', 'EmployeeName', 'Revenue', 'Expense', 'Salary', 'Net Income']]
+    agg_df['Performance Ratio'] = metrics.performance_ratio(agg_df['Revenue'], agg_df['Expense'], agg_df['Salary'])
+    agg_df['Needs Review'] = agg_df['Performance Ratio'] < threshold
+    return agg_df
+
+# --- Everything the branch view shows, without any Streamlit calls ---
+# The dashboard lists employees from its ranking index, so it leaves them out with employees=False.
+def branch_overview(cube, branch_name, employees=True, threshold=REVIEW_THRESHOLD):
+    return overview_bundle(branch_slice(cube, branch_name), branch_name, employees, threshold)
+
+# Same, for a cube already restricted to one branch
+def overview_bundle(branch_cube, branch_name, employees=True, threshold=REVIEW_THRESHOLD):
+    bundle = {
+        'branch': branch_name,
+        'kpis': kpi_overview(branch_cube),
+        'monthly': monthly_series(branch_cube),
+    }
+    if employees:
+        bundle['employees'] = employee_performance(branch_cube, threshold)
+    return bundle
@@ -0,0 +1,114 @@
+import streamlit as st
+
+from data_cache import (
+    append_batches, appended_info, branch_cache, chart_cache, export_cache, loaded_datasets, memory_budget, pivot_cache,
+    rejected_rows, summary_cache
+)
+from data_loader import memory_report
+from profiling import MAX_RUNS, PROFILE_BY_DEFAULT, PROFILE_MEMORY_BY_DEFAULT, StageTracer, traces_csv, traces_json
+
+# --- Sidebar: memory used by the session's frames ---
+def memory_panel(frames):
+    with st.sidebar.expander("🧠 Memory"):
+        for label, frame in frames.items():
+            report = memory_report(frame)
+            st.markdown(f"**{label}** — {len(frame):,} rows, {report['Bytes'].sum() / 1024 ** 2:,.2f} MB")
+            st.dataframe(report, hide_index=True)
+
+# --- Sidebar: datasets shared by all sessions of this server process ---
+def datasets_panel():
+    with st.sidebar.expander("🗃️ Loaded datasets"):
+        datasets = loaded_datasets()
+        st.caption(
+            f"Memory budget: {memory_budget.used / 1024 ** 2:,.1f} of {memory_budget.max_bytes / 1024 ** 2:,.0f} MB"
+        )
+        caches = (("Frames", pivot_cache), ("Branch views", branch_cache), ("Charts", chart_cache),
+                  ("Summaries", summary_cache), ("Exports", export_cache))
+        st.caption(" · ".join(f"{label} {cache.stats()['bytes'] / 1024 ** 2:,.1f} MB" for label, cache in caches))
+        datasets['MB'] = datasets.pop('Bytes') / 1024 ** 2
+        st.dataframe(datasets, hide_index=True)
+
+# --- Sidebar: rows the Arrow engine rejected while parsing the uploads ---
+def rejected_panel(key, shown_rows=1000):
+    report = rejected_rows(key)
+    if report is None or report.empty:
+        return
+    with st.sidebar.expander(f"⚠️ Rejected rows ({len(report):,})"):
+        counts = report.groupby(['Table', 'Column', 'Problem'], sort=True).size().rename('Rows').reset_index()
+        st.dataframe(counts, hide_index=True)
+        st.dataframe(report.head(shown_rows), hide_index=True)
+        st.download_button(
+            "Download rejected rows (CSV)", report.to_csv(index=False), file_name="rejected_rows.csv", mime="text/csv"
+        )
+
+# --- Sidebar: delta transaction files appended to the loaded dataset ---
+# Returns the key and pivot frame of the latest version every delta up to it was accepted into.
+def append_panel(key, pivot_df, emp_file=None, branch_file=None, trans_file=None, by_date=True):
+    deltas = st.sidebar.file_uploader(
+        "Append Transactions CSV", type="csv", accept_multiple_files=True, key="append_transactions"
+    ) or []
+    applied = 0
+    try:
+        for delta_file, key, pivot_df in append_batches(key, pivot_df, deltas, emp_file, branch_file, trans_file, by_date=by_date):
+            applied += 1
+            info = appended_info(key)
+            if info is not None:
+                st.sidebar.caption(
+                    f"➕ {delta_file.name}: {info['rows']:,} rows, "
+                    f"{len(info['months'])} month(s) and {len(info['branches'])} branch(es) refreshed"
+                )
+    except ValueError as exc:
+        st.sidebar.error(f"{deltas[applied].name} was not appended: {exc}")
+    return key, pivot_df
+
+# --- Sidebar: opt-in stage profiling ---
+# Returns an active tracer for this rerun, or None when profiling is off.
+def start_profiling():
+    # A rerun that stopped early never reached profile_panel; release its tracer
+    previous = st.session_state.pop('active_tracer', None)
+    if previous is not None:
+        previous.deactivate()
+    if not st.sidebar.checkbox("⏱️ Profile stages", value=PROFILE_BY_DEFAULT, key="profile_stages"):
+        return None
+    # Traced memory slows allocation for every session of the server, so it has its own opt-in
+    trace_memory = st.sidebar.checkbox(
+        "Trace peak memory", value=PROFILE_MEMORY_BY_DEFAULT, key="profile_memory",
+        help="Slows every session on this server while it runs; one session traces at a time."
+    )
+    tracer = st.session_state['active_tracer'] = StageTracer(trace_memory=trace_memory).activate()
+    return tracer
+
+# Call at the end of the script so every stage of the rerun is in the panel
+def profile_panel(tracer):
+    if tracer is None:
+        return
+    tracer.deactivate()
+    st.session_state.pop('active_tracer', None)
+    runs = st.session_state.setdefault('stage_traces', [])
+    runs.append(tracer.as_dict())
+    del runs[:-MAX_RUNS]
+
+    with st.sidebar.expander("⏱️ Stage timings"):
+        frame = tracer.frame()
+        frame['stage'] = [' ' * depth + name.rsplit('/', 1)[-1] for depth, name in zip(frame['depth'], frame['stage'])]
+        frame['peak_mb'] = frame['peak_bytes'] / 1024 ** 2
+        st.dataframe(frame[['stage', 'wall_s', 'cpu_s', 'peak_mb']], hide_index=True)
+        if tracer.want_memory and not tracer.trace_memory:
+            st.caption("Peak memory not traced: another session is tracing it")
+        st.caption(f"{len(runs)} rerun(s) recorded this session")
+        st.download_button("Download traces (JSON)", traces_json(runs), file_name="stage_traces.json", mime="application/json")
+        st.download_button("Download traces (CSV)", traces_csv(runs), file_name="stage_traces.csv", mime="text/csv")
+
+# --- Sidebar: progress of the background branch view prefetch ---
+# The fragment refreshes itself until the prefetch has finished.
+def prefetch_panel(prefetch, refresh_seconds=1):
+    @st.fragment(run_every=None if prefetch.finished else refresh_seconds)
+    def progress():
+        done, total = prefetch.done, prefetch.total
+        if prefetch.finished:
+            st.caption(f"Branch views ready: {done}/{total}")
+        else:
+            st.progress(done / max(total, 1), text=f"Prefetching branch views: {done}/{total}")
+
+    with st.sidebar:
+        progress()
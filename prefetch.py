@@ -0,0 +1,104 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from charts import monthly_performance_for_branch_chart
+from cube import shard_cube
+from data_cache import appended_info, branch_view, copy_chart_cached, load_chart_cached, put_branch_view
+from overview import overview_bundle
+
+# Threads per dataset; pandas releases the GIL in its group and sum kernels
+PREFETCH_WORKERS = min(4, os.cpu_count() or 1)
+# Branches per shard task, so finished branches show up while the rest run
+SHARD_BRANCHES = 16
+# Datasets whose branch views are kept
+MAX_DATASETS = 4
+
+# --- Every branch overview of one dataset, computed in background threads ---
+# Bundles are kept in the shared branch cache, inside the memory budget, and shared between
+# sessions, so callers must treat them as read-only. An evicted bundle is computed on demand.
+# With a previous prefetch, its finished views of branches not in changed are reused.
+class BranchPrefetch:
+    def __init__(self, cube, key, workers=PREFETCH_WORKERS, previous=None, changed=()):
+        self.key = key
+        self.total = cube['BranchName'].nunique()
+        self.branches = set()
+        self.errors = []
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        if previous is not None:
+            for branch, bundle in previous.ready().items():
+                if branch not in changed and copy_chart_cached(previous.key, key, ['branch', branch]):
+                    put_branch_view(key, branch, bundle)
+                    self.branches.add(branch)
+        if self.branches:
+            cube = cube[~cube['BranchName'].isin(list(self.branches))]
+        pending = cube['BranchName'].nunique()
+        shards = shard_cube(cube, max(1, -(-pending // SHARD_BRANCHES)))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='branch-prefetch')
+        self.futures = [executor.submit(self._run, shard) for shard in shards]
+        executor.shutdown(wait=False)
+
+    def _run(self, shard):
+        for branch, branch_cube in shard.groupby('BranchName', observed=True, sort=True):
+            if self._cancelled.is_set():
+                return
+            try:
+                bundle = overview_bundle(branch_cube, branch, employees=False)
+                load_chart_cached(
+                    self.key, ['branch', branch],
+                    lambda: monthly_performance_for_branch_chart(bundle['monthly'], branch)
+                )
+            except Exception as exc:
+                # The branch view falls back to computing it on demand
+                with self._lock:
+                    self.errors.append((branch, repr(exc)))
+                continue
+            put_branch_view(self.key, branch, bundle)
+            with self._lock:
+                self.branches.add(branch)
+
+    def get(self, branch):
+        return branch_view(self.key, branch)
+
+    # Finished views still in the cache
+    def ready(self):
+        with self._lock:
+            branches = list(self.branches)
+        views = {branch: branch_view(self.key, branch) for branch in branches}
+        return {branch: view for branch, view in views.items() if view is not None}
+
+    @property
+    def done(self):
+        with self._lock:
+            return len(self.branches) + len(self.errors)
+
+    @property
+    def finished(self):
+        return all(future.done() for future in self.futures)
+
+    def cancel(self):
+        self._cancelled.set()
+        for future in self.futures:
+            future.cancel()
+
+_prefetches = OrderedDict()
+_registry_lock = threading.Lock()
+
+# --- Start (once per dataset) or look up the background prefetch ---
+# An appended version only recomputes the branches its delta touched.
+def start_prefetch(cube, key):
+    with _registry_lock:
+        prefetch = _prefetches.get(key)
+        if prefetch is None:
+            info = appended_info(key)
+            previous = _prefetches.get(info['parent']) if info else None
+            changed = set(info['branches']) if info else ()
+            prefetch = _prefetches[key] = BranchPrefetch(cube, key, previous=previous, changed=changed)
+            while len(_prefetches) > MAX_DATASETS:
+                _, evicted = _prefetches.popitem(last=False)
+                evicted.cancel()
+        else:
+            _prefetches.move_to_end(key)
+        return prefetch
@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+# Profiling starts switched on when this is set, e.g. DASHBOARD_PROFILE=1
+PROFILE_BY_DEFAULT = os.environ.get('DASHBOARD_PROFILE', '') not in ('', '0')
+# Peak memory is traced too when this is set, e.g. DASHBOARD_PROFILE_MEMORY=1
+PROFILE_MEMORY_BY_DEFAULT = os.environ.get('DASHBOARD_PROFILE_MEMORY', '') not in ('', '0')
+
+# Reruns kept per session for export
+MAX_RUNS = 50
+
+# Streamlit runs each session's script in its own thread, so the active tracer is per thread
+_local = threading.local()
+
+# tracemalloc is process-wide: its peak is shared by every thread, so only one tracer at a
+# time traces memory. The others still time their stages and leave peak memory empty.
+_tracing_lock = threading.Lock()
+_tracing_owner = None
+
+def _start_tracing(tracer):
+    global _tracing_owner
+    with _tracing_lock:
+        if _tracing_owner is not None:
+            return False
+        _tracing_owner = tracer
+        tracer._started_tracing = not tracemalloc.is_tracing()
+        if tracer._started_tracing:
+            tracemalloc.start()
+        return True
+
+def _stop_tracing(tracer):
+    global _tracing_owner
+    with _tracing_lock:
+        if _tracing_owner is tracer:
+            _tracing_owner = None
+            if tracer._started_tracing:
+                tracemalloc.stop()
+
+# --- Wall time, CPU time and peak memory of named stages in one rerun ---
+# Stages may nest; each record keeps its path ("load/pivot_table") and depth.
+# CPU time is the script thread's own, peak memory is the most traced memory
+# allocated above the stage's starting point while it ran. Tracing memory slows every
+# allocation in the process, so it is asked for separately; trace_memory says whether
+# this tracer got it.
+class StageTracer:
+    def __init__(self, trace_memory=False):
+        self.want_memory = trace_memory
+        self.trace_memory = False
+        self._started_tracing = False
+        self.started = time.time()
+        self.records = []
+        self._stack = []
+        self._active = False
+
+    def activate(self):
+        previous = getattr(_local, 'tracer', None)
+        if previous is not None and previous is not self:
+            previous.deactivate()
+        if not self._active:
+            self._active = True
+            self.trace_memory = self.want_memory and _start_tracing(self)
+        _local.tracer = self
+        return self
+
+    def deactivate(self):
+        if self._active:
+            self._active = False
+            _stop_tracing(self)
+        if getattr(_local, 'tracer', None) is self:
+            _local.tracer = None
+
+    @contextmanager
+    def stage(self, name):
+        path = '/'.join([frame['name'] for frame in self._stack] + [name])
+        memory = self.trace_memory and tracemalloc.is_tracing()
+        frame = {'name': name, 'peak': 0}
+        if memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            frame['base'] = frame['peak'] = current
+        # Recorded in start order, filled in when the stage ends
+        record = {'stage': path, 'depth': len(self._stack), 'wall_s': None, 'cpu_s': None, 'peak_bytes': None}
+        self.records.append(record)
+        self._stack.append(frame)
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            self._stack.pop()
+            record['wall_s'], record['cpu_s'] = wall, cpu
+            if memory and tracemalloc.is_tracing():
+                peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                record['peak_bytes'] = peak - frame['base']
+                if self._stack:
+                    self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+
+    def frame(self):
+        columns = ['stage', 'depth', 'wall_s', 'cpu_s', 'peak_bytes']
+        return pd.DataFrame(self.records, columns=columns)
+
+    def as_dict(self):
+        return {'started': self.started, 'memory_traced': self.trace_memory, 'stages': list(self.records)}
+
+# A named stage of the current rerun; does nothing unless a tracer is active on this thread
+def stage(name):
+    tracer = getattr(_local, 'tracer', None)
+    return tracer.stage(name) if tracer is not None else nullcontext()
+
+# --- Export a session's runs ---
+def traces_json(runs):
+    return json.dumps(runs, indent=2)
+
+def traces_csv(runs):
+    rows = [dict(run=i, started=run['started'], **record) for i, run in enumerate(runs) for record in run['stages']]
+    columns = ['run', 'started', 'stage', 'depth', 'wall_s', 'cpu_s', 'peak_bytes']
+    return pd.DataFrame(rows, columns=columns).to_csv(index=False)
@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from cube import employee_summary
+
+# Metrics employees can be ranked by
+RANKED_METRICS = ['Net Income', 'Revenue', 'Performance Ratio']
+# Performance ratio below which an employee needs review; DASHBOARD_REVIEW_THRESHOLD overrides it
+REVIEW_THRESHOLD = float(os.environ.get('DASHBOARD_REVIEW_THRESHOLD', metrics.PW_THRESHOLD))
+
+EMPLOYEE_KEYS = ['EmployeeID', 'EmployeeName', 'BranchName']
+
+# --- Per-employee metrics kept sorted, company-wide and per branch ---
+# Built once per dataset. Each metric has one order over all employees and one over
+# (branch, metric), where every branch is a contiguous run. Top-K, bottom-K and
+# below-threshold queries are a binary search and a slice of K positions.
+class RankingIndex:
+    def __init__(self, cube, ranked=RANKED_METRICS):
+        employees = employee_summary(cube, by=EMPLOYEE_KEYS)
+        employees = employees[EMPLOYEE_KEYS + ['Revenue', 'Expense', 'Salary', 'Net Income']]
+        employees['Performance Ratio'] = metrics.performance_ratio(
+            employees['Revenue'], employees['Expense'], employees['Salary']
+        )
+        self.employees = employees
+        codes, self.branch_names = pd.factorize(employees['BranchName'].astype(str), sort=True)
+        self.branch_bounds = np.searchsorted(np.sort(codes), np.arange(len(self.branch_names) + 1))
+        self.order = {}
+        self.values = {}
+        self.branch_order = {}
+        self.branch_values = {}
+        for metric in ranked:
+            values = employees[metric].to_numpy(dtype='float64')
+            self.order[metric] = np.argsort(values, kind='stable')
+            self.values[metric] = values[self.order[metric]]
+            self.branch_order[metric] = np.lexsort((values, codes))
+            self.branch_values[metric] = values[self.branch_order[metric]]
+
+    @property
+    def nbytes(self):
+        total = int(self.employees.memory_usage(deep=True).sum()) + self.branch_bounds.nbytes
+        for arrays in (self.order, self.values, self.branch_order, self.branch_values):
+            total += sum(a.nbytes for a in arrays.values())
+        return total
+
+    # Positions and sorted values, ascending, of the company or one branch
+    def _run(self, metric, branch=None):
+        if branch is None:
+            return self.order[metric], self.values[metric]
+        if branch not in self.branch_names:
+            return self.branch_order[metric][:0], self.branch_values[metric][:0]
+        code = self.branch_names.get_loc(branch)
+        lo, hi = self.branch_bounds[code], self.branch_bounds[code + 1]
+        return self.branch_order[metric][lo:hi], self.branch_values[metric][lo:hi]
+
+    def _rows(self, positions, first_rank):
+        rows = self.employees.iloc[positions].reset_index(drop=True)
+        rows.insert(0, 'Rank', np.arange(first_rank, first_rank + len(rows)))
+        return rows
+
+    def count(self, branch=None):
+        if branch is None:
+            return len(self.employees)
+        if branch not in self.branch_names:
+            return 0
+        code = self.branch_names.get_loc(branch)
+        return int(self.branch_bounds[code + 1] - self.branch_bounds[code])
+
+    # Rows start..stop of the ranking, best first (or worst first with descending=False)
+    def ranked(self, metric, branch=None, start=0, stop=None, descending=True):
+        positions, _ = self._run(metric, branch)
+        if descending:
+            positions = positions[::-1]
+        return self._rows(positions[start:stop], start + 1)
+
+    def below_count(self, metric, threshold, branch=None):
+        return int(np.searchsorted(self._run(metric, branch)[1], threshold, side='left'))
+
+    # Rows start..stop of the employees under the threshold, lowest first
+    def below(self, metric, threshold, branch=None, start=0, stop=None):
+        positions, _ = self._run(metric, branch)
+        count = self.below_count(metric, threshold, branch)
+        stop = count if stop is None else min(stop, count)
+        return self._rows(positions[start:stop], start + 1)
@@ -0,0 +1,118 @@
+"""Headless branch and employee reports, built without Streamlit.
+
+    python -m report employee.csv branch.csv transactions.csv --out reports/
+    python -m report --data-dir data/ --out reports/ --format parquet --workers 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from cube import build_cube, monthly_series, shard_cube
+from data_cache import build_pivot_from_snapshot
+from data_loader import load_data
+from overview import overview_bundle
+from ranking import REVIEW_THRESHOLD
+
+BRANCH_OVERVIEW_COLUMNS = [
+    'BranchName', 'Total Sales', 'Total Expenses', 'Net Income', 'Total Employees',
+    'Performance Ratio', 'Performance Status', 'Needs Review',
+]
+
+# --- Load the cube from CSVs or a snapshot directory ---
+def load_cube(emp_file=None, branch_file=None, trans_file=None, data_dir=None):
+    if data_dir:
+        pivot_df = build_pivot_from_snapshot(data_dir, by_date=False)
+    else:
+        pivot_df = load_data(emp_file, branch_file, trans_file, by_date=False, star=True)
+    return build_cube(pivot_df)
+
+# Runs in a worker process: the overview of every branch in the shard
+def overview_shard(shard, threshold=REVIEW_THRESHOLD):
+    branch_rows, employees, monthly = [], [], []
+    for branch, branch_cube in shard.groupby('BranchName', observed=True, sort=True):
+        overview = overview_bundle(branch_cube, branch, threshold=threshold)
+        kpis = overview['kpis']
+        branch_rows.append({
+            'BranchName': branch,
+            'Total Sales': kpis['total_sales'],
+            'Total Expenses': kpis['total_expenses'],
+            'Net Income': kpis['net_income'],
+            'Total Employees': kpis['total_employees'],
+            'Performance Ratio': kpis['performance_ratio'],
+            'Performance Status': kpis['performance_status'],
+            'Needs Review': int(overview['employees']['Needs Review'].sum()),
+        })
+        employees.append(overview['employees'].assign(BranchName=branch))
+        monthly.append(overview['monthly'].assign(BranchName=branch))
+    if not branch_rows:
+        # No branches: empty frames with the columns a branch would have had
+        overview = overview_bundle(shard.iloc[:0], None, threshold=threshold)
+        employees = [overview['employees'].assign(BranchName=pd.Series(dtype=str))]
+        monthly = [overview['monthly'].assign(BranchName=pd.Series(dtype=str))]
+    return pd.DataFrame(branch_rows, columns=BRANCH_OVERVIEW_COLUMNS), pd.concat(employees), pd.concat(monthly)
+
+def build_reports(cube, workers=None, shards=None, threshold=REVIEW_THRESHOLD):
+    workers = workers or os.cpu_count() or 1
+    # An empty cube still goes through one shard, so every report is written with its columns
+    parts = shard_cube(cube, shards or workers) or [cube]
+    if workers == 1:
+        results = [overview_shard(part, threshold) for part in parts]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(overview_shard, parts, [threshold] * len(parts)))
+
+    def combine(i, first_cols):
+        frame = pd.concat([result[i] for result in results], ignore_index=True)
+        return frame[first_cols + [c for c in frame.columns if c not in first_cols]]
+
+    return {
+        'branch_overview': combine(0, ['BranchName']),
+        'employee_performance': combine(1, ['BranchName', 'EmployeeID', 'EmployeeName']),
+        'branch_monthly': combine(2, ['BranchName', 'Month_Year']),
+        'company_monthly': monthly_series(cube),
+    }
+
+def write_reports(reports, out_dir, fmt='csv'):
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for name, frame in reports.items():
+        path = os.path.join(out_dir, f"{name}.{fmt}")
+        if fmt == 'parquet':
+            frame.to_parquet(path, index=False)
+        else:
+            frame.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Write branch and employee reports without opening the dashboard.")
+    parser.add_argument('employees', nargs='?')
+    parser.add_argument('branches', nargs='?')
+    parser.add_argument('transactions', nargs='?')
+    parser.add_argument('--data-dir', help="Snapshot directory to read instead of the three CSVs")
+    parser.add_argument('--out', default='reports', help="Output directory (default: reports)")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--workers', type=int, help="Worker processes (default: all cores)")
+    parser.add_argument('--shards', type=int, help="Branch shards (default: one per worker)")
+    parser.add_argument('--review-threshold', type=float, default=REVIEW_THRESHOLD,
+                        help=f"Needs Review below this performance ratio (default: {REVIEW_THRESHOLD:g})")
+    args = parser.parse_args()
+    if not args.data_dir and not (args.employees and args.branches and args.transactions):
+        parser.error("pass the three CSV files or --data-dir")
+
+    start = time.perf_counter()
+    cube = load_cube(args.employees, args.branches, args.transactions, data_dir=args.data_dir)
+    loaded = time.perf_counter()
+    reports = build_reports(cube, workers=args.workers, shards=args.shards, threshold=args.review_threshold)
+    built = time.perf_counter()
+    for path in write_reports(reports, args.out, args.format):
+        print(path)
+    print(f"Loaded in {loaded - start:.2f}s, "
+          f"{len(reports['branch_overview'])} branches in {built - loaded:.2f}s, "
+          f"written in {time.perf_counter() - built:.2f}s")
+
+if __name__ == '__main__':
+    main()
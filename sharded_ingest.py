@@ -0,0 +1,124 @@
+"""Ingest transactions spread over many files, each shard aggregated in its own worker process.
+
+    python -m sharded_ingest employee.csv branch.csv transactions/ data/ --workers 8
+    python -m sharded_ingest employee.csv branch.csv 2024-*.csv 2025-*.csv data/
+
+The pivot frames are written as a snapshot directory the apps can load with DASHBOARD_DATA_DIR.
+"""
+import argparse
+import glob
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import snapshot
+from csv_schema import REPORT_COLUMNS, read_table
+from data_loader import (
+    aggregate_keys, aggregate_transactions, build_pivot_from_aggregates, combine_aggregates, read_dimensions
+)
+from profiling import stage
+
+SHARD_COLUMNS = ['EmployeeID', 'Date', 'Type', 'Amount']
+# Worker processes; set DASHBOARD_INGEST_WORKERS to leave cores to the server
+SHARD_WORKERS = int(os.environ.get('DASHBOARD_INGEST_WORKERS', os.cpu_count() or 1))
+
+def shard_name(source):
+    return getattr(source, 'name', None) or os.path.basename(str(source))
+
+# Paths go to the workers as they are; uploads as their bytes
+def _shard_source(source):
+    return source.getvalue() if hasattr(source, 'getvalue') else source
+
+# --- Runs in a worker process: one shard's partial aggregates ---
+# A shard that cannot be read at all comes back as a report row instead of failing the ingest.
+def aggregate_shard(name, source, by_date=True):
+    try:
+        if isinstance(source, bytes):
+            source = io.BytesIO(source)
+        table, problems, _ = read_table(source, 'transactions', columns=SHARD_COLUMNS, use_threads=False)
+        transactions = table.to_pandas()
+        transactions['Type'] = transactions['Type'].astype(str)
+        sums = aggregate_transactions(transactions, by_date)
+        report = pd.concat(problems, ignore_index=True) if problems else None
+    except Exception as exc:
+        sums = None
+        report = pd.DataFrame([{'Line': None, 'Column': None, 'Value': None,
+                                'Problem': f"shard skipped: {type(exc).__name__}: {exc}"}])
+    if report is not None:
+        report['Table'] = name
+        report = report[REPORT_COLUMNS]
+    return sums, report
+
+# --- Partial aggregates of every shard, merged ---
+# Returns the combined sums and a report of rejected rows and skipped shards.
+def aggregate_shards(trans_files, by_date=True, workers=SHARD_WORKERS):
+    names = [shard_name(f) for f in trans_files]
+    sources = [_shard_source(f) for f in trans_files]
+    workers = max(1, min(workers, len(sources)))
+    if workers == 1:
+        results = [aggregate_shard(name, source, by_date) for name, source in zip(names, sources)]
+    else:
+        # Forking the multi-threaded server could copy a lock another thread holds into the workers
+        context = multiprocessing.get_context('forkserver')
+        # Workers then fork from a server that has already imported pandas and pyarrow; the
+        # libraries are named too, since this module may not be on the server's path
+        context.set_forkserver_preload(['pandas', 'pyarrow.csv', __name__])
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            results = list(pool.map(aggregate_shard, names, sources, [by_date] * len(sources)))
+
+    sums = combine_aggregates([s for s, _ in results if s is not None], by_date)
+    reports = [report for _, report in results if report is not None]
+    report = pd.concat(reports, ignore_index=True) if reports else pd.DataFrame(columns=REPORT_COLUMNS)
+    return sums, report
+
+# Daily sums rolled up to months, so one ingest gives both pivot frames
+def monthly_aggregates(sums):
+    return sums.groupby(level=aggregate_keys(by_date=False), sort=False).sum()
+
+# --- Pivot frame from the employee and branch files and many transaction files ---
+def load_sharded(emp_file, branch_file, trans_files, by_date=True, workers=SHARD_WORKERS):
+    with stage('read_csv'):
+        employees, branches = read_dimensions(emp_file, branch_file)
+    with stage('aggregate_shards'):
+        sums, report = aggregate_shards(trans_files, by_date, workers)
+    with stage('merge_aggregates'):
+        return build_pivot_from_aggregates(employees, branches, sums, by_date=by_date), report
+
+def _expand(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, '*.csv'))))
+        else:
+            files.append(path)
+    return files
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate many transaction files into a snapshot directory.")
+    parser.add_argument('employees')
+    parser.add_argument('branches')
+    parser.add_argument('transactions', nargs='+', help="Transaction CSVs, or directories of them")
+    parser.add_argument('directory', help="Snapshot directory to write")
+    parser.add_argument('--workers', type=int, default=SHARD_WORKERS, help="Worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    trans_files = _expand(args.transactions)
+    employees, branches = read_dimensions(args.employees, args.branches)
+    sums, report = aggregate_shards(trans_files, by_date=True, workers=args.workers)
+    snapshot.write_pivot(args.directory, build_pivot_from_aggregates(employees, branches, sums, by_date=True), True)
+    snapshot.write_pivot(
+        args.directory, build_pivot_from_aggregates(employees, branches, monthly_aggregates(sums), by_date=False), False
+    )
+    snapshot.write_rejected(args.directory, report)
+    skipped = report['Problem'].str.startswith('shard skipped').sum() if len(report) else 0
+    print(f"{len(trans_files)} shard(s) in {time.perf_counter() - start:.2f}s: "
+          f"{skipped} skipped, {len(report) - skipped} row(s) rejected")
+    print(f"Snapshot written to {args.directory}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Columnar snapshots of the typed input tables and built pivot frames.
+
+Build a snapshot directory from the CSVs (point DASHBOARD_DATA_DIR at it to skip uploads):
+
+    python -m snapshot employee.csv branch.csv transactions.csv data/
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from data_loader import build_pivot, read_tables as read_csv_tables
+
+# Snapshots of uploaded data are written under this directory when it is set (off by default,
+# since they keep uploaded data on disk); only the most recent DASHBOARD_SNAPSHOT_KEEP are kept
+SNAPSHOT_ROOT = os.environ.get('DASHBOARD_SNAPSHOT_DIR', '')
+MAX_SNAPSHOTS = int(os.environ.get('DASHBOARD_SNAPSHOT_KEEP', 16))
+
+# A snapshot directory sessions load directly instead of waiting for uploads
+DATA_DIR = os.environ.get('DASHBOARD_DATA_DIR', '')
+
+TABLE_COLUMNS = {
+    'employees': ['EmployeeID', 'EmployeeName', 'BranchID'],
+    'branches': ['BranchID', 'BranchName'],
+    'transactions': ['EmployeeID', 'Date', 'Type', 'Amount'],
+}
+
+def _table_path(directory, name):
+    return os.path.join(directory, f"{name}.parquet")
+
+def _pivot_name(by_date):
+    return 'pivot_daily' if by_date else 'pivot_monthly'
+
+def snapshot_dir(key):
+    if not SNAPSHOT_ROOT:
+        return None
+    return os.path.join(SNAPSHOT_ROOT, '-'.join(part[:16] for part in key))
+
+# --- Typed tables ---
+# Names and transaction types are stored as categories and Date as a timestamp.
+def type_tables(employees, branches, transactions):
+    employees = employees.astype({'EmployeeName': 'category'})
+    branches = branches.astype({'BranchName': 'category'})
+    transactions = transactions.astype({'Type': 'category'})
+    transactions['Date'] = pd.to_datetime(transactions['Date'])
+    return employees, branches, transactions
+
+# --- Write ---
+# Each writer has its own temporary file, so sessions saving the same snapshot do not collide.
+def _write(frame, path):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        frame.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+def write_tables(directory, employees, branches, transactions):
+    os.makedirs(directory, exist_ok=True)
+    employees, branches, transactions = type_tables(employees, branches, transactions)
+    for name, frame in (('employees', employees), ('branches', branches), ('transactions', transactions)):
+        _write(frame, _table_path(directory, name))
+
+def write_pivot(directory, pivot_df, by_date):
+    os.makedirs(directory, exist_ok=True)
+    _write(pivot_df, _table_path(directory, _pivot_name(by_date)))
+
+# Removes all but the max_snapshots most recently written snapshots of uploads
+def prune_snapshots(root=SNAPSHOT_ROOT, max_snapshots=MAX_SNAPSHOTS):
+    if not root or not os.path.isdir(root):
+        return
+    snapshots = sorted((entry for entry in os.scandir(root) if entry.is_dir()),
+                       key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+    for entry in snapshots[max_snapshots:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+# --- Read (projected, memory-mapped) ---
+def has_tables(directory):
+    return bool(directory) and all(os.path.exists(_table_path(directory, name)) for name in TABLE_COLUMNS)
+
+def has_pivot(directory, by_date):
+    return bool(directory) and os.path.exists(_table_path(directory, _pivot_name(by_date)))
+
+def _read(path, columns=None):
+    return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+# Only the columns the dashboard uses are read; TransactionID is skipped.
+def read_tables(directory):
+    return tuple(_read(_table_path(directory, name), columns) for name, columns in TABLE_COLUMNS.items())
+
+# Employees and branches only, for folding appended transactions into a dataset
+def read_dimensions(directory):
+    return tuple(_read(_table_path(directory, name), TABLE_COLUMNS[name]) for name in ('employees', 'branches'))
+
+def read_transaction_ids(directory):
+    return _read(_table_path(directory, 'transactions'), ['TransactionID'])['TransactionID'].to_numpy()
+
+# Rows the Arrow engine rejected when the snapshot was built
+def write_rejected(directory, report):
+    os.makedirs(directory, exist_ok=True)
+    _write(report, _table_path(directory, 'rejected'))
+
+def read_rejected(directory):
+    path = _table_path(directory, 'rejected') if directory else None
+    return _read(path) if path and os.path.exists(path) else None
+
+def read_pivot(directory, by_date, columns=None):
+    return _read(_table_path(directory, _pivot_name(by_date)), columns)
+
+# Changes whenever a file in the directory is rewritten
+def directory_key(directory):
+    directory = os.path.abspath(directory)
+    stamps = sorted(
+        (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+        for entry in os.scandir(directory) if entry.name.endswith('.parquet')
+    )
+    return ('dir:' + directory, hashlib.sha256(repr(stamps).encode()).hexdigest())
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a Parquet snapshot of the three input CSVs.")
+    parser.add_argument('employees')
+    parser.add_argument('branches')
+    parser.add_argument('transactions')
+    parser.add_argument('directory')
+    args = parser.parse_args()
+
+    employees, branches, transactions = read_csv_tables(args.employees, args.branches, args.transactions)
+    write_tables(args.directory, employees, branches, transactions)
+    for by_date in (True, False):
+        write_pivot(args.directory, build_pivot(employees, branches, transactions, by_date=by_date), by_date)
+    print(f"Snapshot written to {args.directory}")
+
+if __name__ == '__main__':
+    main()
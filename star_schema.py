@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+# Above this many employee x period slots, groups are found by sorting instead of a dense table
+DENSE_KEY_LIMIT = 1 << 24
+
+# --- Narrow fact table plus dense dimension lookups ---
+# Facts keep integer keys only: employee position, date code and type code.
+# Employee -> branch and ID -> name are NumPy arrays indexed by employee position,
+# so names are attached to the aggregated rows and never to individual transactions.
+class StarSchema:
+    def __init__(self, employees, branches, transactions):
+        employees = employees.drop_duplicates('EmployeeID')
+        branches = branches.drop_duplicates('BranchID')
+
+        # Employee dimension, ordered by EmployeeID
+        employees = employees.sort_values('EmployeeID', kind='stable')
+        self.employee_ids = employees['EmployeeID'].to_numpy()
+        emp_index = pd.Index(self.employee_ids)
+        self.employee_name_codes, self.employee_names = pd.factorize(employees['EmployeeName'], sort=True)
+        branch_pos = pd.Index(branches['BranchID']).get_indexer(employees['BranchID'])
+        self.branch_name_codes, self.branch_names = pd.factorize(branches['BranchName'], sort=True)
+        # Branch name code per employee, -1 when the branch or its name is missing
+        self.employee_branch = np.where(branch_pos >= 0, self.branch_name_codes[branch_pos], -1)
+
+        # Date dimension
+        dates = pd.to_datetime(transactions['Date'])
+        date_codes, self.dates = pd.factorize(dates, sort=True)
+        self.date_years = self.dates.year.to_numpy()
+        self.date_months = self.dates.month.to_numpy()
+
+        # Fact table
+        type_codes, self.type_names = pd.factorize(transactions['Type'], sort=True)
+        amounts = transactions['Amount'].to_numpy(dtype='float64', na_value=np.nan)
+        self.fact = pd.DataFrame({
+            'EmployeePos': emp_index.get_indexer(transactions['EmployeeID']).astype('int32'),
+            'DateKey': date_codes.astype('int32'),
+            'TypeCode': type_codes.astype('int16'),
+            'Amount': np.where(np.isnan(amounts), 0.0, amounts),
+        })
+
+    # Rows the merged pivot would keep: known employee with a name, a named branch, a date and a type
+    def valid_rows(self):
+        emp = self.fact['EmployeePos'].to_numpy()
+        known = emp >= 0
+        safe_emp = np.where(known, emp, 0)
+        return (
+            known
+            & (self.employee_name_codes[safe_emp] >= 0)
+            & (self.employee_branch[safe_emp] >= 0)
+            & (self.fact['DateKey'].to_numpy() >= 0)
+            & (self.fact['TypeCode'].to_numpy() >= 0)
+        )
+
+# --- Aggregate on integer keys, attach names to the result ---
+def aggregate_star(star, by_date=True):
+    valid = star.valid_rows()
+    emp = star.fact['EmployeePos'].to_numpy()[valid].astype('int64')
+    date_key = star.fact['DateKey'].to_numpy()[valid]
+    type_code = star.fact['TypeCode'].to_numpy()[valid]
+    amount = star.fact['Amount'].to_numpy()[valid]
+
+    if by_date:
+        period = date_key.astype('int64')
+        n_periods = len(star.dates)
+    else:
+        month_key = star.date_years.astype('int64') * 12 + star.date_months - 1
+        month_codes, month_values = pd.factorize(month_key, sort=True)
+        period = month_codes[date_key].astype('int64')
+        n_periods = len(month_values)
+
+    key = emp * n_periods + period
+    n_keys = len(star.employee_ids) * n_periods
+    if n_keys <= DENSE_KEY_LIMIT:
+        present = np.flatnonzero(np.bincount(key, minlength=n_keys))
+        lookup = np.full(n_keys, -1, dtype='int64')
+        lookup[present] = np.arange(len(present))
+        group = lookup[key]
+    else:
+        present, group = np.unique(key, return_inverse=True)
+
+    n_types = len(star.type_names)
+    sums = np.bincount(group * n_types + type_code, weights=amount, minlength=len(present) * n_types)
+    sums = sums.reshape(len(present), n_types)
+
+    group_emp = present // n_periods
+    group_period = present % n_periods
+    branch_codes = star.employee_branch[group_emp]
+    result = pd.DataFrame({
+        'EmployeeID': star.employee_ids[group_emp],
+        'EmployeeName': pd.Categorical.from_codes(
+            star.employee_name_codes[group_emp], star.employee_names).remove_unused_categories(),
+        'BranchName': pd.Categorical.from_codes(branch_codes, star.branch_names).remove_unused_categories(),
+    })
+    if by_date:
+        result['Year'] = star.date_years[group_period]
+        result['Month'] = star.date_months[group_period]
+        result['Date'] = star.dates[group_period]
+    else:
+        result['Year'] = month_values[group_period] // 12
+        result['Month'] = month_values[group_period] % 12 + 1
+
+    # Only types seen on kept rows become columns, as with pivot_table
+    seen = np.bincount(type_code, minlength=n_types) > 0
+    for i, name in enumerate(star.type_names.tolist()):
+        if seen[i]:
+            result[name] = sums[:, i]
+    return result
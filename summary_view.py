@@ -0,0 +1,47 @@
+import math
+
+import streamlit as st
+
+PAGE_SIZES = [10, 25, 50, 100]
+
+# --- Paginated summary with server-side search and sort ---
+# Only the returned page is rendered by the caller, so the number of widgets
+# on screen is bounded by the page size rather than the number of rows.
+def paginate_summary(summary, key, name_col, sort_columns):
+    col1, col2, col3, col4 = st.columns(4)
+    search = col1.text_input("Search", key=f"{key}_search")
+    sort_by = col2.selectbox("Sort by", [name_col] + sort_columns, key=f"{key}_sort")
+    order = col3.selectbox("Order", ["Ascending", "Descending"], key=f"{key}_order")
+    page_size = col4.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size")
+
+    view = summary
+    if search:
+        view = view[view[name_col].astype(str).str.contains(search, case=False, regex=False)]
+    view = view.sort_values(sort_by, ascending=order == "Ascending", kind="stable")
+
+    start, end = page_bounds(len(view), key, page_size)
+    return view.iloc[start:end]
+
+# --- Rows fetched one page at a time ---
+# fetch(start, end) returns just the rows of the page, so only they are built and formatted.
+def paginate_rows(total_rows, fetch, key, empty="None 🎉"):
+    if not total_rows:
+        st.markdown(empty)
+        return
+    page_size = st.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size")
+    start, end = page_bounds(total_rows, key, page_size)
+    st.dataframe(fetch(start, end), hide_index=True)
+
+# --- Page number input; returns the row range of the selected page ---
+def page_bounds(total_rows, key, page_size):
+    total_pages = max(1, math.ceil(total_rows / page_size))
+    page_key = f"{key}_page"
+    # Keep the page in range when a search, threshold or page size change shrinks the result
+    if st.session_state.get(page_key, 1) > total_pages:
+        st.session_state[page_key] = total_pages
+    page = st.number_input("Page", min_value=1, max_value=total_pages, step=1, key=page_key)
+
+    start = (page - 1) * page_size
+    end = min(start + page_size, total_rows)
+    st.caption(f"Showing {start + 1 if total_rows else 0}–{end} of {total_rows}")
+    return start, end
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+# The dashboard modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generate_data import generate  # noqa: E402
+
+@pytest.fixture(scope='session')
+def dataset(tmp_path_factory):
+    return generate(str(tmp_path_factory.mktemp('data')), 5000, months=6, seed=7)
@@ -0,0 +1,24 @@
+import io
+
+import pandas as pd
+
+# Rows are compared in a fixed order with names as text, since row order and
+# category order are not part of the contract.
+def normalized(pivot_df):
+    frame = pivot_df.copy()
+    for col in ['EmployeeName', 'BranchName']:
+        frame[col] = frame[col].astype(str)
+    keys = [col for col in ['EmployeeID', 'Year', 'Month', 'Date'] if col in frame.columns]
+    return frame.sort_values(keys, ignore_index=True)
+
+def assert_same_pivot(actual, expected):
+    pd.testing.assert_frame_equal(normalized(actual), normalized(expected), check_dtype=False)
+
+def paths(dataset):
+    return dataset['employees'], dataset['branches'], dataset['transactions']
+
+def csv_bytes(frame):
+    buf = io.BytesIO()
+    frame.to_csv(buf, index=False)
+    buf.seek(0)
+    return buf
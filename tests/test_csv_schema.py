@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+
+from data_loader import INGEST_MODES, load_data, read_tables_arrow
+from helpers import assert_same_pivot, csv_bytes, paths
+
+@pytest.mark.parametrize('by_date', [True, False])
+def test_arrow_engine_matches_load_data_on_valid_files(dataset, by_date):
+    expected = load_data(*paths(dataset), by_date=by_date)
+    arrow = INGEST_MODES['Arrow CSV (multi-threaded)']
+    assert_same_pivot(load_data(*paths(dataset), by_date=by_date, **arrow), expected)
+
+def test_bad_rows_are_dropped_and_reported(dataset):
+    transactions = pd.read_csv(dataset['transactions'])
+    bad = transactions.astype({'Amount': object, 'Date': object, 'EmployeeID': object})
+    bad.loc[0, 'Type'] = 'Refund'
+    bad.loc[1, 'Amount'] = 'twelve'
+    bad.loc[2, 'Date'] = '31/12/2024'
+    bad.loc[3, 'EmployeeID'] = 999_999
+
+    (_, _, kept), report = read_tables_arrow(dataset['employees'], dataset['branches'], csv_bytes(bad))
+    # Rows with an unknown EmployeeID are parsed, then dropped by the merge
+    assert len(kept) == len(transactions) - 3
+    assert list(report['Line']) == [2, 3, 4, 5]
+    assert list(report['Column']) == ['Type', 'Amount', 'Date', 'EmployeeID']
+    assert list(report['Problem'])[:2] == ['unknown type', 'not a number']
+    assert report['Problem'].iloc[2].startswith('not a date')
+    assert report['Problem'].iloc[3] == 'unknown EmployeeID'
+
+    # The rest of the file builds the same frame as the valid rows alone
+    expected = load_data(dataset['employees'], dataset['branches'], csv_bytes(transactions.iloc[4:]))
+    assert_same_pivot(load_data(dataset['employees'], dataset['branches'], csv_bytes(bad), engine='arrow'), expected)
@@ -0,0 +1,175 @@
+import gc
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import altair as alt
+import pandas as pd
+import pytest
+
+import data_cache
+from data_cache import (
+    DatasetHandle, DatasetRefs, FrameCache, MemoryBudget, attach_session, open_dataset, rejected_rows
+)
+
+def uploads(dataset, transactions=None):
+    files = [open(dataset[name], 'rb').read() for name in ('employees', 'branches', 'transactions')]
+    if transactions is not None:
+        files[2] = transactions.to_csv(index=False).encode()
+    return [io.BytesIO(data) for data in files]
+
+# --- Ingest engines ---
+def test_engines_keep_their_own_frames_and_reports(dataset):
+    transactions = pd.read_csv(dataset['transactions'])
+    transactions.loc[0, 'Type'] = 'Refund'
+    for first, second in (('pandas', 'arrow'), ('arrow', 'pandas')):
+        data_cache.pivot_cache.clear()
+        loaded = {}
+        for engine in (first, second):
+            loaded[engine] = open_dataset(*uploads(dataset, transactions), engine=engine)
+        (pandas_key, pandas_df), (arrow_key, arrow_df) = loaded['pandas'], loaded['arrow']
+        assert pandas_key != arrow_key
+        assert 'Refund' in pandas_df.columns
+        assert 'Refund' not in arrow_df.columns
+        assert rejected_rows(pandas_key).empty
+        assert len(rejected_rows(arrow_key)) == 1
+        # The pandas engine has no report to cache
+        assert data_cache.pivot_cache.get(pandas_key + ('rejected',), count=False) is None
+
+# --- Shared caches ---
+def caches(max_bytes, refs):
+    budget = MemoryBudget(max_bytes, in_use=refs.in_use)
+    return budget, FrameCache(max_entries=2, budget=budget), FrameCache(budget=budget)
+
+def test_unattached_datasets_are_evicted_first():
+    refs = DatasetRefs()
+    cache = FrameCache(max_bytes=300, in_use=refs.in_use)
+    for dataset in 'abc':
+        cache.put((dataset, 1), b'x' * 100, dataset=dataset)
+    refs.attach('a')
+    cache.get(('b', 1))
+    # c was used more recently than a, but no session is attached to it
+    cache.put(('d', 1), b'x' * 100, dataset='d')
+    assert set(cache.usage()) == {'a', 'b', 'd'}
+    refs.attach('b')
+    cache.put(('e', 1), b'x' * 100, dataset='e')
+    assert set(cache.usage()) == {'a', 'b', 'e'}
+    # With every other dataset attached, the least recently used goes
+    refs.attach('e')
+    cache.put(('f', 1), b'x' * 100, dataset='f')
+    assert set(cache.usage()) == {'b', 'e', 'f'}
+
+def test_a_new_dataset_keeps_its_own_entries():
+    refs = DatasetRefs()
+    cache = FrameCache(max_bytes=300, in_use=refs.in_use)
+    cache.put(('a', 1), b'x' * 100, dataset='a')
+    refs.attach('a')
+    for n in range(3):
+        cache.put(('b', n), b'x' * 100, dataset='b')
+    # Nobody has attached to b yet; the attached dataset still gives way to it
+    assert cache.usage() == {'b': (3, 300)}
+    # Within one dataset, the least recently used entry goes
+    cache.get(('b', 0))
+    cache.put(('b', 3), b'x' * 100, dataset='b')
+    assert cache.get(('b', 1)) is None
+    assert cache.get(('b', 0)) is not None
+
+def test_one_budget_covers_every_cache():
+    refs = DatasetRefs()
+    budget, small, frames = caches(300, refs)
+    small.put(('a', 'chart'), b'x' * 100, dataset='a')
+    frames.put(('a', 'pivot'), b'x' * 100, dataset='a')
+    frames.put(('b', 'pivot'), b'x' * 150, dataset='b')
+    # The frame insert evicted from the other cache, which gives up entries first
+    assert small.get(('a', 'chart')) is None
+    assert frames.get(('a', 'pivot')) is not None
+    assert budget.used == 250
+    # The entry cap stays per cache
+    for n in range(3):
+        small.put(('b', n), b'x', dataset='b')
+    assert small.stats()['entries'] == 2
+
+def test_a_frame_over_the_budget_is_kept_alone():
+    cache = FrameCache(max_bytes=100)
+    cache.put('small', b'x' * 50)
+    big = cache.put('big', b'x' * 500)
+    assert cache.get('big') is big
+    assert cache.get('small') is None
+    cache.put('next', b'x' * 10)
+    assert cache.get('big') is None
+
+def test_concurrent_builds_of_one_key_run_once():
+    cache = FrameCache()
+    calls = []
+    started = threading.Event()
+
+    def build():
+        calls.append(1)
+        started.wait(5)
+        return b'built'
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(cache.get_or_build, 'key', build) for _ in range(8)]
+        time.sleep(0.2)
+        started.set()
+        results = [future.result() for future in futures]
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert cache.stats()['misses'] == 1 and cache.stats()['hits'] == 7
+
+def test_a_failed_build_is_retried():
+    cache = FrameCache()
+
+    def fail():
+        raise OSError('disk')
+
+    with pytest.raises(OSError):
+        cache.get_or_build('key', fail)
+    assert cache.get_or_build('key', lambda: b'built') == b'built'
+
+# --- Sessions attached to datasets ---
+def test_handles_release_on_replace_and_collection():
+    refs = DatasetRefs()
+    state = {}
+    handle = DatasetHandle(refs, 'a')
+    state['dataset_handle'] = handle
+    assert refs.sessions('a') == 1
+    # Releasing twice, or again on collection, counts once
+    handle.release()
+    handle.release()
+    assert refs.sessions('a') == 0
+
+    other = {'dataset_handle': DatasetHandle(refs, 'a')}
+    state['dataset_handle'] = DatasetHandle(refs, 'a')
+    assert refs.sessions('a') == 2
+    del other
+    gc.collect()
+    assert refs.sessions('a') == 1
+
+def test_attach_session_moves_the_hold_to_the_new_dataset():
+    state = {}
+    attach_session(state, ('a',))
+    first = state['dataset_handle']
+    assert attach_session(state, ('a',)) is first
+    assert data_cache.dataset_refs.sessions(('a',)) == 1
+    attach_session(state, ('b',))
+    assert data_cache.dataset_refs.sessions(('a',)) == 0
+    assert data_cache.dataset_refs.sessions(('b',)) == 1
+    state.clear()
+    gc.collect()
+    assert data_cache.dataset_refs.sessions(('b',)) == 0
+
+# --- Chart specs ---
+def test_chart_specs_are_cached_as_dicts():
+    calls = []
+
+    def build():
+        calls.append(1)
+        return alt.Chart(pd.DataFrame({'x': [1, 2]})).mark_bar().encode(x='x:Q')
+
+    spec = data_cache.load_chart_cached(('spec',), ['view'], build)
+    assert isinstance(spec, dict) and spec['mark']['type'] == 'bar'
+    assert data_cache.load_chart_cached(('spec',), ['view'], build) is spec
+    assert len(calls) == 1
+    assert data_cache.chart_cache.usage()[('spec',)][1] > len(str(spec['datasets']))
@@ -0,0 +1,123 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube import branch_summary, employee_summary, kpi_totals
+from data_loader import load_data
+from date_index import DateRangeIndex, RangeSums, range_summary
+
+@pytest.fixture(scope='module')
+def index(dataset):
+    return DateRangeIndex(load_data(dataset['employees'], dataset['branches'], dataset['transactions']))
+
+def random_selection(rng, index):
+    branches = list(rng.choice(index.branch_names, rng.integers(0, 3), replace=False)) if rng.random() < 0.7 else None
+    employees = None
+    if rng.random() < 0.7:
+        employees = list(rng.choice(index.employee_names, rng.integers(0, 20), replace=False))
+        if rng.random() < 0.2:
+            employees.append('Nobody')
+    return branches, employees
+
+# --- Branch and employee selections ---
+def test_select_matches_a_scan_of_the_employees(index):
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        branches, employees = random_selection(rng, index)
+        mask = np.ones(len(index.employees), dtype=bool)
+        if branches:
+            mask &= index.employees['BranchName'].isin(branches).to_numpy()
+        if employees:
+            mask &= index.employees['EmployeeName'].isin(employees).to_numpy()
+        np.testing.assert_array_equal(index.select(branches, employees), np.flatnonzero(mask))
+
+def test_unknown_labels_select_nobody(index):
+    assert len(index.select(['No such branch'])) == 0
+    assert len(index.select(None, ['Nobody'])) == 0
+
+# --- Date ranges, checked against a brute-force filter of the pivot rows ---
+def brute_force_rows(index, start, end, branches, employees):
+    frame = index.frame
+    days = frame['Date'].dt.date
+    mask = (days >= start) & (days <= end)
+    if branches:
+        mask &= frame['BranchName'].astype(str).isin(branches)
+    if employees:
+        mask &= frame['EmployeeName'].astype(str).isin(employees)
+    return frame[mask]
+
+def random_range(rng, index):
+    first, last = index.date_bounds()
+    span = (last - first).days
+    # Ends up to 30 days outside the data, so ranges fall before, after and across it
+    start, end = sorted(int(day) for day in rng.integers(-30, span + 30, size=2))
+    return first + datetime.timedelta(days=start), first + datetime.timedelta(days=end)
+
+def as_text(frame):
+    frame = frame.copy()
+    for col in ['EmployeeName', 'BranchName']:
+        if col in frame.columns:
+            frame[col] = frame[col].astype(str)
+    return frame
+
+def assert_summary_matches(index, start, end, branches, employees):
+    kpis, branch, employee = range_summary(index, start, end, branches, employees)
+    rows = brute_force_rows(index, start, end, branches, employees)
+
+    expected = kpi_totals(rows)
+    assert kpis.keys() == expected.keys()
+    for name, value in expected.items():
+        assert kpis[name] == pytest.approx(value, abs=1e-6)
+
+    expected_branch = as_text(branch_summary(rows)).sort_values('BranchName', ignore_index=True)
+    pd.testing.assert_frame_equal(
+        as_text(branch).sort_values('BranchName', ignore_index=True), expected_branch,
+        check_dtype=False, atol=1e-6
+    )
+    keys = ['EmployeeName', 'BranchName']
+    pd.testing.assert_frame_equal(
+        as_text(employee).sort_values(keys, ignore_index=True),
+        as_text(employee_summary(rows)).sort_values(keys, ignore_index=True),
+        check_dtype=False, atol=1e-6
+    )
+
+def test_rows_match_a_brute_force_filter(index):
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        start, end = random_range(rng, index)
+        branches, employees = random_selection(rng, index)
+        rows = index.rows(start, end, index.select(branches, employees))
+        pd.testing.assert_frame_equal(rows, brute_force_rows(index, start, end, branches, employees))
+
+def test_range_summary_matches_a_brute_force_filter(index):
+    rng = np.random.default_rng(2)
+    for _ in range(200):
+        start, end = random_range(rng, index)
+        assert_summary_matches(index, start, end, *random_selection(rng, index))
+
+@pytest.mark.parametrize('offsets', [(-60, -10), (-10, 20), (20, 40), (-10, 10_000), (10_000, 10_030), (5, 5)])
+def test_ranges_before_after_and_across_the_data(index, offsets):
+    first, _ = index.date_bounds()
+    start, end = (first + datetime.timedelta(days=offset) for offset in offsets)
+    branches = list(index.branch_names[:2])
+    # Whole branches take the branch prefix sums; part of a branch groups the employee totals
+    assert_summary_matches(index, start, end, branches, None)
+    assert_summary_matches(index, start, end, branches, list(index.employee_names[::3]))
+
+# --- Prefix sum bounds ---
+def test_bounds_clamp_to_the_data():
+    groups = np.array([0, 0, 0, 1, 1])
+    days = np.array([0, 2, 5, 1, 5])
+    sums = RangeSums(groups, days, np.ones((5, 1)))
+    # Sorted keys: group 0 at days 0, 2, 5, then group 1 at days 1, 5
+    np.testing.assert_array_equal(sums.bounds([0, 1], -10, 100), ([0, 3], [3, 5]))
+    np.testing.assert_array_equal(sums.bounds([0, 1], 1, 4), ([1, 3], [2, 4]))
+    np.testing.assert_array_equal(sums.bounds([0, 1], 6, 9), ([3, 5], [3, 5]))
+    np.testing.assert_array_equal(sums.bounds([0, 1], -9, -1), ([0, 3], [0, 3]))
+    # An empty range never gives a negative count
+    np.testing.assert_array_equal(sums.bounds([0], 4, 1), ([2], [2]))
+    totals, rows = sums.totals([0, 1], 2, 5)
+    np.testing.assert_array_equal(totals[:, 0], [2, 1])
+    np.testing.assert_array_equal(rows, [2, 1])
@@ -0,0 +1,42 @@
+import gzip
+import io
+
+import pandas as pd
+import pytest
+
+from data_loader import load_data
+from exports import EXPORT_FORMATS, export_bytes
+
+@pytest.fixture(scope='module')
+def frame(dataset):
+    return load_data(dataset['employees'], dataset['branches'], dataset['transactions'])
+
+def read_back(data, fmt):
+    if fmt == 'Parquet':
+        return pd.read_parquet(io.BytesIO(data))
+    if fmt == 'CSV (gzip)':
+        data = gzip.decompress(data)
+    return pd.read_csv(io.BytesIO(data), parse_dates=['Date'])
+
+def as_read(frame, fmt):
+    if fmt == 'Parquet':
+        return frame.reset_index(drop=True)
+    # CSV carries text and numbers only
+    return frame.astype({'EmployeeName': str, 'BranchName': str}).reset_index(drop=True)
+
+@pytest.mark.parametrize('fmt', list(EXPORT_FORMATS))
+@pytest.mark.parametrize('chunk_rows', [1000, 100_000])
+def test_exports_round_trip(frame, fmt, chunk_rows):
+    data = export_bytes(frame, fmt, chunk_rows=chunk_rows)
+    pd.testing.assert_frame_equal(read_back(data, fmt), as_read(frame, fmt), check_dtype=False)
+
+# Parquet writes one row group per chunk, so only the CSV bytes are independent of it
+@pytest.mark.parametrize('fmt', ['CSV', 'CSV (gzip)'])
+def test_chunking_does_not_change_the_bytes(frame, fmt):
+    assert export_bytes(frame, fmt, chunk_rows=700) == export_bytes(frame, fmt, chunk_rows=100_000)
+
+@pytest.mark.parametrize('fmt', list(EXPORT_FORMATS))
+def test_empty_selection_keeps_the_columns(frame, fmt):
+    empty = read_back(export_bytes(frame.iloc[:0], fmt), fmt)
+    assert list(empty.columns) == list(frame.columns)
+    assert empty.empty
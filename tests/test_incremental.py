@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from cube import build_cube
+from data_loader import load_data, read_dimensions
+from helpers import assert_same_pivot, csv_bytes, paths
+from incremental import DuplicateTransactionsError, append_transactions, read_transaction_ids
+
+@pytest.fixture(scope='module')
+def split(dataset):
+    transactions = pd.read_csv(dataset['transactions'])
+    cut = transactions['Date'].sort_values().iloc[len(transactions) * 4 // 5]
+    base = transactions[transactions['Date'] < cut]
+    # One delta also reaches back into months the base already has
+    older = base.sample(frac=0.02, random_state=0)
+    base = base.drop(older.index)
+    newer = transactions[transactions['Date'] >= cut]
+    return base, [pd.concat([newer.iloc[::2], older]), newer.iloc[1::2]]
+
+def load_base(dataset, base, by_date):
+    pivot_df = load_data(dataset['employees'], dataset['branches'], csv_bytes(base), by_date=by_date)
+    return pivot_df, build_cube(pivot_df), read_transaction_ids(csv_bytes(base))
+
+@pytest.mark.parametrize('by_date', [True, False])
+def test_appended_deltas_match_load_data(dataset, split, by_date):
+    base, deltas = split
+    employees, branches = read_dimensions(dataset['employees'], dataset['branches'])
+    pivot_df, cube, ids = load_base(dataset, base, by_date)
+    for delta in deltas:
+        appended = append_transactions(pivot_df, cube, employees, branches, ids, csv_bytes(delta), by_date=by_date)
+        pivot_df, cube, ids = appended['pivot'], appended['cube'], appended['ids']
+
+    expected = load_data(*paths(dataset), by_date=by_date)
+    assert_same_pivot(pivot_df, expected)
+    assert_same_pivot(cube, build_cube(expected))
+
+def test_loaded_or_repeated_ids_are_rejected(dataset, split):
+    base, deltas = split
+    employees, branches = read_dimensions(dataset['employees'], dataset['branches'])
+    pivot_df, cube, ids = load_base(dataset, base, True)
+    for delta, duplicates in ((pd.concat([deltas[1], base.iloc[:3]]), base['TransactionID'].iloc[:3]),
+                              (pd.concat([deltas[1], deltas[1].iloc[:2]]), deltas[1]['TransactionID'].iloc[:2])):
+        with pytest.raises(DuplicateTransactionsError) as error:
+            append_transactions(pivot_df, cube, employees, branches, ids, csv_bytes(delta))
+        assert error.value.duplicates == sorted(duplicates)
@@ -0,0 +1,49 @@
+import threading
+import tracemalloc
+
+from profiling import StageTracer, stage
+
+def run_in_thread(target):
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+
+# --- Memory tracing is held by one tracer at a time ---
+def test_only_one_tracer_traces_memory():
+    first = StageTracer(trace_memory=True).activate()
+    assert first.trace_memory and tracemalloc.is_tracing()
+    others = []
+
+    def second_session():
+        tracer = StageTracer(trace_memory=True).activate()
+        with stage('load'):
+            bytearray(1024)
+        tracer.deactivate()
+        others.append(tracer)
+
+    run_in_thread(second_session)
+    (second,) = others
+    # The other session is timed but leaves the first one's tracing alone
+    assert not second.trace_memory
+    assert second.records[0]['wall_s'] is not None and second.records[0]['peak_bytes'] is None
+    assert tracemalloc.is_tracing()
+
+    with stage('load'):
+        bytearray(4 * 1024 ** 2)
+    first.deactivate()
+    assert first.records[0]['peak_bytes'] >= 4 * 1024 ** 2
+    assert not tracemalloc.is_tracing()
+
+    # Once released, the next tracer that asks gets it
+    third = StageTracer(trace_memory=True).activate()
+    assert third.trace_memory
+    third.deactivate()
+
+def test_memory_is_not_traced_unless_asked():
+    tracer = StageTracer().activate()
+    with stage('load'):
+        pass
+    tracer.deactivate()
+    assert not tracemalloc.is_tracing()
+    assert tracer.records[0]['peak_bytes'] is None
+    assert tracer.as_dict()['memory_traced'] is False
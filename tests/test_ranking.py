@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from cube import build_cube
+from data_loader import load_data
+from ranking import RANKED_METRICS, RankingIndex
+
+@pytest.fixture(scope='module')
+def cube(dataset):
+    return build_cube(load_data(dataset['employees'], dataset['branches'], dataset['transactions'], by_date=False))
+
+@pytest.fixture(scope='module')
+def ranking(cube):
+    return RankingIndex(cube)
+
+def scope(ranking, branch):
+    employees = ranking.employees
+    return employees if branch is None else employees[employees['BranchName'] == branch]
+
+def branches(ranking):
+    return [None] + list(ranking.branch_names)
+
+def test_count_uses_the_ranked_metrics(cube, ranking):
+    index = RankingIndex(cube, ranked=['Revenue'])
+    assert index.count() == len(ranking.employees)
+    for branch in ranking.branch_names:
+        assert index.count(branch) == len(scope(ranking, branch))
+    assert index.count('No such branch') == 0
+
+@pytest.mark.parametrize('metric', RANKED_METRICS)
+def test_ranked_pages_follow_a_full_sort(ranking, metric):
+    for branch in branches(ranking):
+        employees = scope(ranking, branch)
+        for descending in (True, False):
+            expected = np.sort(employees[metric].to_numpy())
+            if descending:
+                expected = expected[::-1]
+            pages = [ranking.ranked(metric, branch, start, start + 7, descending) for start in range(0, len(employees), 7)]
+            values = np.concatenate([page[metric].to_numpy() for page in pages]) if pages else expected[:0]
+            np.testing.assert_array_equal(values, expected)
+            if pages:
+                assert pages[0]['Rank'].iloc[0] == 1
+                assert pages[-1]['Rank'].iloc[-1] == len(employees)
+                assert set(pages[0]['BranchName']) <= ({branch} if branch else set(ranking.branch_names))
+
+@pytest.mark.parametrize('metric', RANKED_METRICS)
+def test_below_matches_a_threshold_filter(ranking, metric):
+    thresholds = np.quantile(ranking.employees[metric], [0, 0.25, 0.5, 1]).tolist() + [-np.inf, np.inf]
+    for branch in branches(ranking):
+        employees = scope(ranking, branch)
+        for threshold in thresholds:
+            expected = np.sort(employees.loc[employees[metric] < threshold, metric].to_numpy())
+            assert ranking.below_count(metric, threshold, branch) == len(expected)
+            np.testing.assert_array_equal(ranking.below(metric, threshold, branch)[metric].to_numpy(), expected)
+            page = ranking.below(metric, threshold, branch, start=2, stop=5)
+            np.testing.assert_array_equal(page[metric].to_numpy(), expected[2:5])
+            assert list(page['Rank']) == list(range(3, 3 + len(page)))
+
+def test_unknown_branch_has_no_rows(ranking):
+    assert ranking.ranked('Revenue', 'No such branch').empty
+    assert ranking.below_count('Revenue', np.inf, 'No such branch') == 0
@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+
+from report import build_reports, load_cube, write_reports
+
+@pytest.fixture(scope='module')
+def cube(dataset):
+    return load_cube(dataset['employees'], dataset['branches'], dataset['transactions'])
+
+def test_shards_give_the_same_reports(cube):
+    whole = build_reports(cube, workers=1, shards=1)
+    sharded = build_reports(cube, workers=1, shards=3)
+    assert len(whole['branch_overview']) == cube['BranchName'].nunique()
+    for name, frame in whole.items():
+        pd.testing.assert_frame_equal(sharded[name], frame)
+
+# --- No rows: every report is still written, with its columns ---
+@pytest.mark.parametrize('fmt', ['csv', 'parquet'])
+def test_an_empty_cube_writes_empty_reports(cube, tmp_path, fmt):
+    columns = {name: list(frame.columns) for name, frame in build_reports(cube, workers=1).items()}
+    reports = build_reports(cube.iloc[:0], workers=1)
+    assert {name: list(frame.columns) for name, frame in reports.items()} == columns
+    assert all(frame.empty for frame in reports.values())
+    for path in write_reports(reports, str(tmp_path), fmt):
+        frame = pd.read_parquet(path) if fmt == 'parquet' else pd.read_csv(path)
+        assert frame.empty and len(frame.columns)
@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+from data_loader import load_data
+from helpers import assert_same_pivot, csv_bytes, paths
+from sharded_ingest import load_sharded
+
+def monthly_shards(dataset):
+    transactions = pd.read_csv(dataset['transactions'])
+    shards = []
+    for month, part in transactions.groupby(transactions['Date'].str[:7]):
+        shards.append(csv_bytes(part))
+        shards[-1].name = f"{month}.csv"
+    return shards
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_sharded_ingest_matches_load_data(dataset, workers):
+    pivot_df, report = load_sharded(dataset['employees'], dataset['branches'], monthly_shards(dataset), workers=workers)
+    assert report.empty
+    assert_same_pivot(pivot_df, load_data(*paths(dataset)))
+
+def test_unreadable_shard_is_skipped_and_reported(dataset):
+    shards = monthly_shards(dataset)
+    broken = csv_bytes(pd.DataFrame({'Unrelated': [1, 2]}))
+    broken.name = 'broken.csv'
+    pivot_df, report = load_sharded(dataset['employees'], dataset['branches'], shards + [broken], workers=2)
+    assert list(report['Table']) == ['broken.csv']
+    assert report['Problem'].iloc[0].startswith('shard skipped')
+    assert_same_pivot(pivot_df, load_data(*paths(dataset)))
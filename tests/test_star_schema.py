@@ -0,0 +1,9 @@
+import pytest
+
+from data_loader import INGEST_MODES, load_data
+from helpers import assert_same_pivot, paths
+
+@pytest.mark.parametrize('by_date', [True, False])
+def test_star_schema_matches_load_data(dataset, by_date):
+    expected = load_data(*paths(dataset), by_date=by_date)
+    assert_same_pivot(load_data(*paths(dataset), by_date=by_date, **INGEST_MODES['Star schema']), expected)
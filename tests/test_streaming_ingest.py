@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from data_loader import DEFAULT_CHUNKSIZE, INGEST_MODES, expand_pivot, load_data
+from helpers import assert_same_pivot, paths
+
+# The merge and pivot_table of the original load_data, before any of the ingest modes
+def baseline_load_data(emp_file, branch_file, trans_file):
+    employees = pd.read_csv(emp_file)
+    branches = pd.read_csv(branch_file)
+    transactions = pd.read_csv(trans_file)
+
+    emp_branch = pd.merge(employees, branches, on='BranchID', how='left')
+    df = pd.merge(transactions, emp_branch, on='EmployeeID', how='left')
+
+    df['Date'] = pd.to_datetime(df['Date'])
+    df['Year'] = df['Date'].dt.year
+    df['Month'] = df['Date'].dt.month
+
+    pivot_df = df.pivot_table(
+        index=['EmployeeID', 'EmployeeName', 'BranchName', 'Year', 'Month', 'Date'],
+        columns='Type',
+        values='Amount',
+        aggfunc='sum',
+        fill_value=0
+    ).reset_index()
+    pivot_df.columns = ['_'.join(col).strip() if isinstance(col, tuple) else col for col in pivot_df.columns.values]
+
+    pivot_df['BranchName'] = pivot_df['BranchName'].astype(str)
+    for col in ['Revenue', 'Expense', 'Salary']:
+        if col not in pivot_df.columns:
+            pivot_df[col] = 0
+        else:
+            pivot_df[col] = pd.to_numeric(pivot_df[col], errors='coerce').fillna(0)
+
+    pivot_df['Net Income'] = pivot_df['Revenue'] - pivot_df['Expense'] - pivot_df['Salary']
+    return pivot_df
+
+# load_data, back in the original dtypes, is the original frame row for row
+@pytest.mark.parametrize('mode', ['Standard', 'Streaming (large files)'])
+def test_load_data_matches_the_original(dataset, mode):
+    pivot_df = load_data(*paths(dataset), **INGEST_MODES[mode])
+    pd.testing.assert_frame_equal(expand_pivot(pivot_df), baseline_load_data(*paths(dataset)))
+
+# Streaming in chunks of any size builds the same frame as reading the file in one go
+@pytest.mark.parametrize('by_date', [True, False])
+@pytest.mark.parametrize('chunksize', [DEFAULT_CHUNKSIZE, 700])
+def test_streaming_matches_load_data(dataset, chunksize, by_date):
+    expected = load_data(*paths(dataset), by_date=by_date)
+    assert_same_pivot(load_data(*paths(dataset), by_date=by_date, chunksize=chunksize), expected)